@@ -0,0 +1,259 @@
+"""Append-only archive of pipeline results
+
+Records (URL, content, source extractor, summary and free-form metadata)
+are zlib-compressed and appended to numbered segment files; a SQLite index
+maps every URL and content hash to the segment and offset of its latest
+record, so a lookup is one index probe plus one read. Appends take
+SQLite's write lock while they write, which makes concurrent appends from
+threads and from other processes safe. Re-archiving a URL supersedes the
+old record; ``compact`` rewrites segments that are mostly superseded.
+
+    python archive.py results/ stats
+    python archive.py results/ get https://example.com/article
+    python archive.py results/ export > results.jsonl
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+
+MAGIC = b"ARC1"
+HEADER = struct.Struct(">4sII")
+
+
+def content_hash(content):
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+class ArchiveError(Exception):
+    pass
+
+
+class Archive:
+    def __init__(self, path="archive", segment_bytes=64 * 1024 * 1024, level=6):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.level = level
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite"), timeout=60,
+                                     check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS records (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    segment INTEGER,
+                    offset INTEGER,
+                    length INTEGER,
+                    stored_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_hash ON records (content_hash)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_position ON records (segment, offset)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    id INTEGER PRIMARY KEY,
+                    size INTEGER,
+                    live INTEGER
+                )
+            """)
+
+    def segment_path(self, segment):
+        return os.path.join(self.path, f"segment-{segment:06d}.arc")
+
+    def _encode(self, record):
+        payload = zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8"), self.level)
+        return HEADER.pack(MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+    def _decode(self, data):
+        magic, length, crc = HEADER.unpack_from(data)
+        payload = data[HEADER.size:HEADER.size + length]
+        if magic != MAGIC or len(payload) != length or zlib.crc32(payload) != crc:
+            raise ArchiveError("رکورد آرشیو خراب است.")
+        return json.loads(zlib.decompress(payload))
+
+    def _active_segment(self, needed):
+        row = self._conn.execute("SELECT id, size FROM segments ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None or (row[1] and row[1] + needed > self.segment_bytes):
+            segment = (row[0] if row else 0) + 1
+            self._conn.execute("INSERT INTO segments VALUES (?, 0, 0)", (segment,))
+            return segment
+        return row[0]
+
+    def _write(self, segment, data):
+        with open(self.segment_path(segment), "ab") as f:
+            # Bytes left by an append that crashed before committing are simply skipped.
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return offset
+
+    def _index(self, url, digest, segment, offset, length, stored_at):
+        previous = self._conn.execute("SELECT segment, length FROM records WHERE url = ?", (url,)).fetchone()
+        if previous is not None:
+            self._conn.execute("UPDATE segments SET live = live - ? WHERE id = ?", (previous[1], previous[0]))
+        self._conn.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                           (url, digest, segment, offset, length, stored_at))
+        self._conn.execute("UPDATE segments SET size = ? , live = live + ? WHERE id = ?",
+                           (offset + length, length, segment))
+
+    def append(self, url, content, source=None, summary=None, meta=None):
+        """Store a result for ``url``, superseding any earlier record; returns its content hash"""
+        digest = content_hash(content)
+        record = {'url': url, 'content_hash': digest, 'content': content, 'source': source,
+                  'summary': summary, 'meta': meta or {}, 'stored_at': time.time()}
+        data = self._encode(record)
+        with self._lock:
+            # BEGIN IMMEDIATE holds the database write lock, so only one writer
+            # (in any process) picks the segment and offset at a time.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                segment = self._active_segment(len(data))
+                offset = self._write(segment, data)
+                self._index(url, digest, segment, offset, len(data), record['stored_at'])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return digest
+
+    def _read(self, segment, offset, length):
+        with open(self.segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return self._decode(f.read(length))
+
+    def _lookup(self, query, value):
+        for attempt in range(2):
+            with self._lock:
+                row = self._conn.execute(query, (value,)).fetchone()
+            if row is None:
+                return None
+            try:
+                return self._read(*row)
+            except FileNotFoundError:
+                # A concurrent compaction moved the record; the index now points to its new place.
+                if attempt:
+                    raise
+        return None
+
+    def get(self, url):
+        return self._lookup("SELECT segment, offset, length FROM records WHERE url = ?", url)
+
+    def get_by_hash(self, digest):
+        return self._lookup("SELECT segment, offset, length FROM records WHERE content_hash = ? LIMIT 1", digest)
+
+    def __contains__(self, url):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM records WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def __iter__(self):
+        """Stream the current record of every URL in storage order, one segment file open at a time"""
+        last = (0, -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT segment, offset, length FROM records WHERE (segment, offset) > (?, ?) "
+                    "ORDER BY segment, offset LIMIT 500", last).fetchall()
+            if not rows:
+                return
+            handle, handle_segment = None, None
+            try:
+                for segment, offset, length in rows:
+                    if segment != handle_segment:
+                        if handle is not None:
+                            handle.close()
+                        handle, handle_segment = open(self.segment_path(segment), "rb"), segment
+                    handle.seek(offset)
+                    yield self._decode(handle.read(length))
+            finally:
+                if handle is not None:
+                    handle.close()
+            last = rows[-1][:2]
+
+    def compact(self, min_garbage=0.5):
+        """Copy the live records out of segments that are at least ``min_garbage`` superseded, then delete them"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                active = self._conn.execute("SELECT MAX(id) FROM segments").fetchone()[0]
+                sparse = [segment for segment, size, live in
+                          self._conn.execute("SELECT id, size, live FROM segments WHERE id != ?", (active,))
+                          if size == 0 or 1 - live / size >= min_garbage]
+                moved = 0
+                for segment in sparse:
+                    rows = self._conn.execute(
+                        "SELECT url, content_hash, offset, length, stored_at FROM records WHERE segment = ? "
+                        "ORDER BY offset", (segment,)).fetchall()
+                    with open(self.segment_path(segment), "rb") as f:
+                        for url, digest, offset, length, stored_at in rows:
+                            f.seek(offset)
+                            data = f.read(length)
+                            target = self._active_segment(length)
+                            self._index(url, digest, target, self._write(target, data), length, stored_at)
+                            moved += 1
+                    self._conn.execute("DELETE FROM segments WHERE id = ?", (segment,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        for segment in sparse:
+            try:
+                os.remove(self.segment_path(segment))
+            except FileNotFoundError:
+                pass
+        return {'segments_removed': len(sparse), 'records_moved': moved}
+
+    def stats(self):
+        with self._lock:
+            records = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            segments, size, live = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(live), 0) FROM segments").fetchone()
+        return {'records': records, 'segments': segments, 'bytes': size, 'live_bytes': live,
+                'garbage_ratio': 1 - live / size if size else 0.0}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or maintain a result archive.")
+    parser.add_argument("path", help="archive directory")
+    parser.add_argument("command", choices=["stats", "get", "hash", "export", "compact"])
+    parser.add_argument("key", nargs="?", help="URL for get, content hash for hash")
+    args = parser.parse_args()
+
+    archive = Archive(args.path)
+    try:
+        if args.command == "stats":
+            print(json.dumps(archive.stats(), indent=2))
+        elif args.command in ("get", "hash"):
+            record = archive.get(args.key) if args.command == "get" else archive.get_by_hash(args.key)
+            if record is None:
+                print("not found", file=sys.stderr)
+                sys.exit(1)
+            print(json.dumps(record, indent=2, ensure_ascii=False))
+        elif args.command == "export":
+            for record in archive:
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            print(json.dumps(archive.compact(), indent=2))
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from researcher_agent import ResearcherAgent
+from metrics import Metrics, LogExporter, PrometheusExporter
+from resilience import Resilience
+from language import detect_language
+
+
+def read_urls(stream, skip=()):
+    for line in stream:
+        url = line.strip()
+        if url and not url.startswith('#') and url not in skip:
+            yield url
+
+
+def load_done_urls(output_file):
+    """Collect the URLs already written to a previous (possibly interrupted) run"""
+    done = set()
+    if not os.path.exists(output_file):
+        return done
+    with open(output_file, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['url'])
+            except (ValueError, KeyError):
+                # The last line of an interrupted run may be cut off half way.
+                continue
+    return done
+
+
+def open_output(output_file, resume):
+    if output_file == '-':
+        return sys.stdout
+    if resume and os.path.exists(output_file):
+        needs_newline = False
+        if os.path.getsize(output_file):
+            with open(output_file, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        out = open(output_file, "a", encoding="utf-8")
+        if needs_newline:
+            out.write("\n")
+        return out
+    return open(output_file, "w", encoding="utf-8")
+
+
+def make_record(url, result, error):
+    record = {'url': url, 'content': None, 'source': None, 'language': None, 'summary': None, 'timings': {},
+              'error': None}
+    if result:
+        stats = result.get('stats', {})
+        record['content'] = result['content']
+        record['source'] = result['source']
+        # Pages served from the page cache were cleaned earlier and carry no detected language.
+        record['language'] = stats['language'] if 'language' in stats else detect_language(result['content'])
+        record['timings'] = {
+            'fetch': stats.get('fetch_seconds'),
+            'extract': stats.get('extract_seconds'),
+        }
+        if stats.get('cache'):
+            record['cache'] = stats['cache']
+        if 'scores' in stats:
+            record['extractors'] = {
+                'seconds': stats['extractor_seconds'],
+                'scores': stats['scores'],
+                'winner_score': stats.get('winner_score'),
+            }
+    if error:
+        record['error'] = str(error)
+    return record
+
+
+def summarize_record(summarizer, record, force=False):
+    started = time.perf_counter()
+    try:
+        stats = summarizer.summarize_with_stats(record['content'], force=force, language=record['language'])
+        record['summary'] = stats.pop('summary')
+        record['llm'] = stats
+    except Exception as e:
+        record['error'] = str(e)
+    record['timings']['summarize'] = time.perf_counter() - started
+    return record
+
+
+async def run(urls, out, workers=10, per_host=2, delay=0.0, summarizer=None, cache=None, bypass_cache=False,
+              force_summary=False, race_budget=None, metrics=None, max_bytes=5 * 1024 * 1024, llm_workers=4,
+              llm_queue=8, parse_processes=0, extractor_stats=None, archive=None,
+              resilience=None, language_group=0):
+    researcher = ResearcherAgent(cache=cache, race=race_budget is not None, race_budget=race_budget or 5.0,
+                                 metrics=metrics, max_bytes=max_bytes, parse_processes=parse_processes,
+                                 extractor_stats=extractor_stats, resilience=resilience)
+    scheduler = None
+    if summarizer is not None:
+        from llm_scheduler import SummaryScheduler
+        scheduler = SummaryScheduler(llm_workers, llm_queue)
+    counts = {'ok': 0, 'failed': 0}
+    loop = asyncio.get_running_loop()
+    archiving = set()
+
+    def archived(future):
+        # Failed appends stay in the set so their error is raised at the end of the run.
+        if future.exception() is None:
+            archiving.discard(future)
+
+    def write(record):
+        counts['failed' if record['error'] else 'ok'] += 1
+        if archive is not None and not record['error']:
+            meta = {key: value for key, value in record.items() if key not in ('url', 'content', 'source', 'summary')}
+            # Appends fsync under the archive's write lock; keep them off the thread driving extraction.
+            future = loop.run_in_executor(None, archive.append, record['url'], record['content'], record['source'],
+                                          record['summary'], meta)
+            archiving.add(future)
+            future.add_done_callback(archived)
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    async def summarize(record):
+        # Waits (and so stops pulling extraction results) while the summary queue is full.
+        future = await scheduler.submit(summarize_record, summarizer, record, force_summary)
+        future.add_done_callback(lambda f: write(f.result()))
+
+    # With language_group > 0, pages wait until that many of the same language are
+    # extracted and then go to the LLM back to back, so consecutive requests share
+    # their prompt prefix and the server's prompt cache stays warm.
+    groups = {}
+    async for url, result, error in researcher.extract_many(urls, concurrency=workers, per_host=per_host, delay=delay,
+                                                             bypass_cache=bypass_cache):
+        record = make_record(url, result, error)
+        if summarizer is None or error:
+            write(record)
+            continue
+        if not language_group:
+            await summarize(record)
+            continue
+        group = groups.setdefault(record['language'], [])
+        group.append(record)
+        if len(group) >= language_group:
+            for grouped in groups.pop(record['language']):
+                await summarize(grouped)
+    for group in groups.values():
+        for grouped in group:
+            await summarize(grouped)
+    if scheduler is not None:
+        await scheduler.close()
+    await asyncio.gather(*archiving)
+    researcher.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract (and optionally summarize) a list of URLs into a JSONL file.")
+    parser.add_argument("input", nargs="?", default="-", help="file with one URL per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=10, help="number of URLs processed concurrently")
+    parser.add_argument("--per-host", type=int, default=2, help="maximum parallel downloads per host")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between two downloads from the same host")
+    parser.add_argument("--race", metavar="SECONDS", type=float,
+                        help="run all extractors in parallel and keep the best result ready within SECONDS")
+    parser.add_argument("--processes", type=int, default=0, metavar="N",
+                        help="parse pages in N worker processes instead of threads (0: threads, -1: one per core)")
+    parser.add_argument("--retries", type=int, default=2, help="retries of a download after a transient error")
+    parser.add_argument("--hedge-after", type=float, metavar="SECONDS",
+                        help="send a second copy of a download that is still running after SECONDS")
+    parser.add_argument("--max-mb", type=float, default=5.0, help="abort pages larger than this many megabytes")
+    parser.add_argument("--extractor-stats", metavar="PATH",
+                        help="SQLite file of per-domain extractor statistics used to try the best extractor first")
+    parser.add_argument("--archive", metavar="DIR", help="also append every result to this compressed archive")
+    parser.add_argument("--summarize", action="store_true", help="also summarize every extracted page")
+    parser.add_argument("--cache", metavar="PATH", help="SQLite file used to cache and revalidate fetched pages")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached pages (they are still updated)")
+    parser.add_argument("--summary-cache", metavar="PATH", help="SQLite file used to cache LLM summaries")
+    parser.add_argument("--regenerate", action="store_true", help="call the LLM even for cached summaries")
+    parser.add_argument("--metrics-log", action="store_true", help="log every stage timing as JSON to stderr")
+    parser.add_argument("--prometheus", metavar="PATH", help="write aggregated stage metrics in Prometheus text format")
+    parser.add_argument("--llama-model", metavar="GGUF",
+                        help="summarize in-process with this llama.cpp model instead of Ollama")
+    parser.add_argument("--llm-url", default="http://localhost:11434", help="base URL of the Ollama server")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="maximum LLM requests in flight")
+    parser.add_argument("--llm-queue", type=int, default=8, help="extracted pages allowed to wait for the LLM")
+    parser.add_argument("--llm-timeout", type=float, default=120.0, help="seconds before an LLM request is abandoned")
+    parser.add_argument("--llm-retries", type=int, default=2, help="retries of a failed or overloaded LLM request")
+    parser.add_argument("--group-by-language", type=int, default=0, metavar="N",
+                        help="send pages to the LLM in runs of N with the same language (0: in arrival order)")
+    parser.add_argument("--dedup", action="store_true", help="reuse summaries of near-duplicate pages in this batch")
+    parser.add_argument("--dedup-db", metavar="PATH", help="persist the near-duplicate index across runs (implies --dedup)")
+    parser.add_argument("--resume", action="store_true", help="skip URLs already present in the output file")
+    args = parser.parse_args()
+
+    if args.processes < 0:
+        args.processes = os.cpu_count()
+
+    done = set()
+    if args.resume and args.output != '-':
+        done = load_done_urls(args.output)
+
+    metrics = None
+    prometheus = None
+    if args.metrics_log or args.prometheus:
+        metrics = Metrics()
+        if args.metrics_log:
+            logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(message)s")
+            metrics.exporters.append(LogExporter())
+        if args.prometheus:
+            prometheus = PrometheusExporter()
+            metrics.exporters.append(prometheus)
+
+    summarizer = None
+    if args.summarize:
+        from summarizer_agent import SummarizerAgent
+        from llm_scheduler import OllamaClient
+        summary_cache = None
+        if args.summary_cache:
+            from summary_cache import SummaryCache
+            summary_cache = SummaryCache(args.summary_cache)
+        dedup = None
+        if args.dedup or args.dedup_db:
+            from dedup import NearDuplicateIndex
+            dedup = NearDuplicateIndex(args.dedup_db)
+        llm_client = None
+        if not args.llama_model:
+            llm_client = OllamaClient(args.llm_url, max_in_flight=args.llm_concurrency, timeout=args.llm_timeout,
+                                      retries=args.llm_retries)
+        summarizer = SummarizerAgent(cache=summary_cache, metrics=metrics, dedup=dedup,
+                                     model_path=args.llama_model, llm_client=llm_client)
+
+    cache = None
+    if args.cache:
+        from http_cache import HttpCache
+        cache = HttpCache(args.cache)
+    resilience = Resilience(retries=args.retries, hedge_after=args.hedge_after, metrics=metrics)
+    archive = None
+    if args.archive:
+        from archive import Archive
+        archive = Archive(args.archive)
+    extractor_stats = None
+    if args.extractor_stats:
+        from extractor_stats import ExtractorStats
+        extractor_stats = ExtractorStats(args.extractor_stats)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding="utf-8")
+    out = open_output(args.output, args.resume)
+    try:
+        counts = asyncio.run(run(read_urls(source, done), out, args.workers, args.per_host, args.delay, summarizer,
+                                 cache, args.refresh, args.regenerate, args.race, metrics,
+                                 int(args.max_mb * 1024 * 1024), args.llm_concurrency, args.llm_queue,
+                                 args.processes, extractor_stats, archive, resilience, args.group_by_language))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        if cache is not None:
+            cache.close()
+        if extractor_stats is not None:
+            extractor_stats.close()
+        if archive is not None:
+            archive.close()
+        if prometheus is not None:
+            prometheus.write(args.prometheus)
+
+    print(f"done: {counts['ok']} ok, {counts['failed']} failed, {len(done)} already done", file=sys.stderr)
+    if resilience.stats():
+        print(f"unhealthy hosts: {resilience.stats()}", file=sys.stderr)
+    if summarizer is not None and summarizer.cache is not None:
+        print(f"summary cache: {summarizer.cache.stats()}", file=sys.stderr)
+    if summarizer is not None and summarizer.dedup is not None:
+        print(f"near duplicates: {summarizer.dedup.stats()}", file=sys.stderr)
+    if summarizer is not None and summarizer.llm_client is not None:
+        print(f"llm requests: {summarizer.llm_client.stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Local stand-ins for news sites and the Ollama API, used by benchmark.py"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping a keep-alive connection when they exit is expected here, not an error.
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class _BackgroundServer:
+    handler = None
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = _QuietHTTPServer((host, port), self.handler)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server.owner
+        if server.latency:
+            time.sleep(server.latency)
+        path = urlsplit(self.path).path
+        if path == "/robots.txt":
+            body = b"User-agent: *\nDisallow: /private/\n"
+            content_type = "text/plain"
+        else:
+            body = server.pages.get(path.lstrip("/"))
+            content_type = "text/html; charset=utf-8"
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SiteServer(_BackgroundServer):
+    """Serves every file of a corpus directory at /<file name>, with an optional per-request latency
+
+    Query strings are ignored, so ``/en_small.html?n=1`` and ``?n=2`` are
+    distinct URLs for the agents but the same document.
+    """
+    handler = _SiteHandler
+
+    def __init__(self, corpus_dir, latency=0.0, host="127.0.0.1", port=0):
+        super().__init__(host, port)
+        self.latency = latency
+        self.pages = {}
+        for name in sorted(os.listdir(corpus_dir)):
+            if name.endswith(".html"):
+                with open(os.path.join(corpus_dir, name), "rb") as f:
+                    self.pages[name] = f.read()
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server.owner
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with server.lock:
+            server.requests += 1
+            if server.fail_every and server.requests % server.fail_every == 0:
+                fail = True
+            else:
+                fail = False
+        if fail:
+            body = json.dumps({"error": "simulated overload"}).encode()
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        time.sleep(server.first_token_latency)
+        tokens = server.summary_tokens(payload.get("prompt", ""))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        if payload.get("stream", True):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                self._write_chunk(json.dumps({"response": token, "done": False}) + "\n")
+                if server.token_latency:
+                    time.sleep(server.token_latency)
+            self._write_chunk(json.dumps({"response": "", "done": True, "eval_count": len(tokens)}) + "\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(server.token_latency * len(tokens))
+            body = json.dumps({"response": "".join(tokens), "done": True, "eval_count": len(tokens)}).encode()
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+class FakeOllamaServer(_BackgroundServer):
+    """Minimal /api/generate endpoint returning a canned structured summary
+
+    ``first_token_latency`` and ``token_latency`` (seconds) shape the fake
+    generation time; ``fail_every`` answers every n-th request with a 503.
+    """
+    handler = _OllamaHandler
+
+    def __init__(self, first_token_latency=0.05, token_latency=0.002, fail_every=0, host="127.0.0.1", port=0):
+        super().__init__(host, port)
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def summary_tokens(self, prompt):
+        words = prompt.split()
+        title = " ".join(words[-8:-4]) or "Summary"
+        text = (f"# {title}\n\nA short summary of a text with {len(words)} words.\n\n"
+                "## Key Points\n- First point\n- Second point\n- Third point\n- Fourth point\n- Fifth point\n")
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
@@ -0,0 +1,262 @@
+"""Offline throughput benchmark for ResearcherAgent and SummarizerAgent
+
+Serves bench_corpus/ from a local HTTP server with configurable latency,
+summarizes against a fake Ollama endpoint and prints one JSON document
+with pages/sec, per-stage and per-extractor latency percentiles and peak
+memory, so runs can be diffed against each other.
+
+    python benchmark.py --copies 20 --workers 8 --latency 0.05 -o bench.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from bench_servers import SiteServer, FakeOllamaServer
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(ROOT_DIR, "bench_corpus")
+
+STARTUP_MODULES = ["researcher_agent", "summarizer_agent", "extract_and_summarize", "gui_app"]
+
+FIRST_PAINT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+import gui_app
+imported = time.perf_counter()
+app = QApplication(sys.argv)
+window = gui_app.WebsiteSummarizer(warm_up=False)
+window.show()
+app.processEvents()
+painted = time.perf_counter()
+print(json.dumps({'import_seconds': imported - started, 'first_paint_seconds': painted - started}))
+"""
+
+
+def percentiles(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {'count': 0}
+
+    def rank(p):
+        # Nearest-rank percentile.
+        return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': rank(50),
+        'p95': rank(95),
+        'p99': rank(99),
+        'max': values[-1],
+    }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux.
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_python(code):
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    return result, time.perf_counter() - started
+
+
+def bench_startup(repeats):
+    """Cold-start cost: per-module import time and GUI time to first paint, each in a fresh interpreter"""
+    report = {'imports': {}}
+    for module in STARTUP_MODULES:
+        samples = []
+        for _ in range(repeats):
+            result, _ = run_python(
+                f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)")
+            if result.returncode == 0:
+                samples.append(float(result.stdout.strip().splitlines()[-1]))
+        report['imports'][module] = percentiles(samples)
+
+    paints, imports, totals = [], [], []
+    for _ in range(repeats):
+        result, total = run_python(FIRST_PAINT_SCRIPT)
+        if result.returncode != 0:
+            report['first_paint'] = {'error': result.stderr.strip().splitlines()[-1:]}
+            return report
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        paints.append(timings['first_paint_seconds'])
+        imports.append(timings['import_seconds'])
+        totals.append(total)
+    report['first_paint'] = {
+        'gui_import': percentiles(imports),
+        'first_paint': percentiles(paints),
+        'process_wall': percentiles(totals),
+    }
+    return report
+
+
+def bench_extractors(researcher, pages, repeats):
+    """Time every extractor on every corpus page without any network"""
+    timings = {}
+    for name, html in pages.items():
+        html = html.decode("utf-8")
+        for source, extractor in researcher.extractors():
+            samples = timings.setdefault(source, {'seconds': [], 'empty': 0})
+            for _ in range(repeats):
+                started = time.perf_counter()
+                content = extractor(f"http://bench.local/{name}", html)
+                samples['seconds'].append(time.perf_counter() - started)
+                if not content:
+                    samples['empty'] += 1
+    return {source: dict(percentiles(s['seconds']), empty=s['empty']) for source, s in timings.items()}
+
+
+async def bench_pipeline(researcher, urls, workers, per_host):
+    fetch, extract, total, sources, errors = [], [], [], {}, 0
+    quality, source_quality = [], {}
+    started = time.perf_counter()
+    async for url, result, error in researcher.extract_many(urls, concurrency=workers, per_host=per_host):
+        if error:
+            errors += 1
+            continue
+        stats = result['stats']
+        fetch.append(stats.get('fetch_seconds'))
+        extract.append(stats.get('extract_seconds'))
+        total.append((stats.get('fetch_seconds') or 0) + (stats.get('extract_seconds') or 0))
+        sources[result['source']] = sources.get(result['source'], 0) + 1
+        # score_content of the text that was kept, so faster runs can be checked for worse output.
+        quality.append(stats.get('quality'))
+        source_quality.setdefault(result['source'], []).append(stats.get('quality'))
+    elapsed = time.perf_counter() - started
+    return {
+        'pages': len(urls),
+        'errors': errors,
+        'seconds': elapsed,
+        'pages_per_sec': len(urls) / elapsed if elapsed else None,
+        'stages': {
+            'fetch': percentiles(fetch),
+            'extract': percentiles(extract),
+            'fetch+extract': percentiles(total),
+        },
+        'sources': sources,
+        'quality': dict(percentiles(quality), by_source={
+            source: percentiles(values).get('mean') for source, values in source_quality.items()
+        }),
+    }
+
+
+def bench_summarizer(base_url, contents):
+    from summarizer_agent import SummarizerAgent
+    summarizer = SummarizerAgent(base_url=base_url, verbose=False)
+    seconds, chunks = [], 0
+    started = time.perf_counter()
+    for content in contents:
+        t = time.perf_counter()
+        stats = summarizer.summarize_with_stats(content)
+        seconds.append(time.perf_counter() - t)
+        chunks += stats['chunks']
+    elapsed = time.perf_counter() - started
+    return {
+        'documents': len(contents),
+        'chunks': chunks,
+        'seconds': elapsed,
+        'docs_per_sec': len(contents) / elapsed if elapsed else None,
+        'summarize': percentiles(seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline extraction/summarization benchmark.")
+    parser.add_argument("--copies", type=int, default=10, help="distinct URLs per corpus page")
+    parser.add_argument("--workers", type=int, default=8, help="extract_many concurrency")
+    parser.add_argument("--per-host", type=int, default=8, help="extract_many per-host cap")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated server latency in seconds")
+    parser.add_argument("--repeats", type=int, default=3, help="offline runs per extractor and page")
+    parser.add_argument("--summaries", type=int, default=5, help="documents to summarize (0 to skip)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM first-token latency")
+    parser.add_argument("--processes", type=int, default=0, help="parse pages in this many worker processes")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="order extractors per domain from learned statistics (implies --split-hosts)")
+    parser.add_argument("--split-hosts", action="store_true",
+                        help="serve every corpus page from its own port so each one is a separate domain")
+    parser.add_argument("--race", type=float, metavar="SECONDS", help="benchmark race mode with this budget")
+    parser.add_argument("--startup-runs", type=int, default=3,
+                        help="fresh interpreters used to time imports and first paint (0 to skip)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report the Python heap peak via tracemalloc (slows parsing down noticeably)")
+    parser.add_argument("-o", "--output", default="-", help="JSON output file, or - for stdout")
+    args = parser.parse_args()
+
+    startup = bench_startup(args.startup_runs) if args.startup_runs else None
+
+    if args.trace_memory:
+        tracemalloc.start()
+    from researcher_agent import ResearcherAgent
+    extractor_stats = None
+    if args.adaptive:
+        from extractor_stats import ExtractorStats
+        extractor_stats = ExtractorStats(seed=0)
+    researcher = ResearcherAgent(race=args.race is not None, race_budget=args.race or 5.0,
+                                 parse_processes=args.processes, extractor_stats=extractor_stats)
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': vars(args),
+    }
+    if startup is not None:
+        report['startup'] = startup
+
+    with SiteServer(CORPUS_DIR, latency=args.latency) as site:
+        report['corpus'] = {name: len(body) for name, body in site.pages.items()}
+        report['extractors'] = bench_extractors(researcher, site.pages, args.repeats)
+
+        with ExitStack() as stack:
+            hosts = {name: site for name in site.pages}
+            if args.split_hosts or args.adaptive:
+                hosts = {name: stack.enter_context(SiteServer(CORPUS_DIR, latency=args.latency)) for name in site.pages}
+            urls = [f"{hosts[name].url}/{name}?n={i}" for name in site.pages for i in range(args.copies)]
+            report['pipeline'] = asyncio.run(bench_pipeline(researcher, urls, args.workers, args.per_host))
+        if extractor_stats is not None:
+            report['extractor_stats'] = extractor_stats.report()
+
+        if args.summaries:
+            contents = []
+            for name in site.pages:
+                contents.append(researcher.extract_content(f"{site.url}/{name}")['content'])
+            contents = (contents * args.summaries)[:args.summaries]
+            with FakeOllamaServer(first_token_latency=args.llm_latency) as llm:
+                report['summarizer'] = bench_summarizer(llm.url, contents)
+
+    report['memory'] = {'max_rss_mb': peak_rss_mb()}
+    if args.trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report['memory']['python_peak_mb'] = peak / (1024 * 1024)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# test_researcher.py is a manual script that extracts live news sites; it is not part of the test suite.
+collect_ignore = ["test_researcher.py"]
@@ -0,0 +1,360 @@
+"""Site crawl mode: discover pages from seeds and sitemaps, then extract them
+
+URLs wait in a SQLite frontier (so an interrupted crawl can be resumed)
+and are deduplicated with a Bloom filter whose size is fixed up front,
+which keeps memory flat no matter how many links are seen. Pages are
+fetched through ``ResearcherAgent.extract_many``, so robots.txt, the
+per-host limits and the optional page cache all apply.
+
+    python crawler.py https://example.com/news/ --max-depth 2 --db crawl.sqlite -o pages.jsonl
+    python crawler.py https://example.com/sitemap.xml --max-pages 5000 -o pages.jsonl
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import math
+import re
+import sqlite3
+import sys
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
+
+from http_cache import normalize_url
+from researcher_agent import ResearcherAgent
+
+SKIPPED_EXTENSIONS = re.compile(
+    r'\.(jpe?g|png|gif|webp|svg|ico|css|js|json|pdf|zip|gz|rar|7z|mp3|mp4|avi|mov|webm|woff2?|ttf|exe|dmg|apk)$',
+    re.IGNORECASE,
+)
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+
+class BloomFilter:
+    """Fixed-size set membership with false positives at about ``error_rate`` once ``capacity`` items are added"""
+
+    def __init__(self, capacity=1000000, error_rate=0.001, data=None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(data) if data is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        # Double hashing: k positions from two independent 64-bit hashes.
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Add an item; returns False if it was (probably) present already"""
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << position % 8) for position in self._positions(item))
+
+
+class Frontier:
+    """Persistent FIFO of URLs to crawl with depth, per-host limits and Bloom-filter dedup
+
+    ``path=None`` keeps the frontier in memory. URLs that were handed out but
+    not finished when the process stopped are retried after a restart.
+    """
+
+    def __init__(self, path=None, max_depth=2, max_pages=None, max_per_host=None, bloom_capacity=1000000):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_per_host = max_per_host
+        self.bloom_capacity = bloom_capacity
+        self.conn = sqlite3.connect(path or ":memory:")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT,
+                host TEXT,
+                depth INTEGER,
+                state TEXT DEFAULT 'pending'
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS urls_state ON urls (state, id)")
+        try:
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS urls_url ON urls (url)")
+        except sqlite3.IntegrityError:
+            # A frontier written before the index existed may hold duplicates; keep the first of each.
+            self.conn.execute("DELETE FROM urls WHERE id NOT IN (SELECT MIN(id) FROM urls GROUP BY url)")
+            self.conn.execute("CREATE UNIQUE INDEX urls_url ON urls (url)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB)")
+        self.conn.execute("UPDATE urls SET state = 'pending' WHERE state = 'in_progress'")
+        self.conn.commit()
+        self.hosts = dict(self.conn.execute("SELECT host, COUNT(*) FROM urls GROUP BY host"))
+        self.total = sum(self.hosts.values())
+        self.in_flight = {}
+        self._unsaved = 0
+        self.bloom = self._load_bloom()
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _load_bloom(self):
+        data, count, size, hashes = (self._meta(key) for key in ('bloom', 'bloom_count', 'bloom_size', 'bloom_hashes'))
+        if None not in (data, count, size, hashes) and int(count) == self.total:
+            bloom = BloomFilter(self.bloom_capacity, data=data)
+            # The saved bits are only valid for the size and hash count they were written with.
+            if (bloom.size, bloom.hashes) == (int(size), int(hashes)):
+                return bloom
+        # Missing, stale after a crash or sized for another capacity: rebuild it from the stored URLs.
+        bloom = BloomFilter(self.bloom_capacity)
+        for (url,) in self.conn.execute("SELECT url FROM urls"):
+            bloom.add(url)
+        return bloom
+
+    def add(self, item):
+        """Add an item; returns False if it was (probably) present already"""
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << position % 8) for position in self._positions(item))
+
+
+class Frontier:
+    """Persistent FIFO of URLs to crawl with depth, per-host limits and Bloom-filter dedup
+
+    ``path=None`` keeps the frontier in memory. URLs that were handed out but
+    not finished when the process stopped are retried after a restart.
+    """
+
+    def __init__(self, path=None, max_depth=2, max_pages=None, max_per_host=None, bloom_capacity=1000000):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_per_host = max_per_host
+        self.bloom_capacity = bloom_capacity
+        self.conn = sqlite3.connect(path or ":memory:")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT,
+                host TEXT,
+                depth INTEGER,
+                state TEXT DEFAULT 'pending'
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS urls_state ON urls (state, id)")
+        try:
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS urls_url ON urls (url)")
+        except sqlite3.IntegrityError:
+            # A frontier written before the index existed may hold duplicates; keep the first of each.
+            self.conn.execute("DELETE FROM urls WHERE id NOT IN (SELECT MIN(id) FROM urls GROUP BY url)")
+            self.conn.execute("CREATE UNIQUE INDEX urls_url ON urls (url)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB)")
+        self.conn.execute("UPDATE urls SET state = 'pending' WHERE state = 'in_progress'")
+        self.conn.commit()
+        self.hosts = dict(self.conn.execute("SELECT host, COUNT(*) FROM urls GROUP BY host"))
+        self.total = sum(self.hosts.values())
+        self.in_flight = {}
+        self._unsaved = 0
+        self.bloom = self._load_bloom()
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _load_bloom(self):
+        bloom = BloomFilter(self.bloom_capacity)
+        data = self._meta('bloom')
+        count, size, hashes = self._meta('bloom_count'), self._meta('bloom_size'), self._meta('bloom_hashes')
+        # The saved bits are only valid for the same size and hash count, i.e. the same capacity.
+        if data is not None and count is not None and int(count) == self.total \
+                and size is not None and int(size) == bloom.size and hashes is not None and int(hashes) == bloom.hashes:
+            return BloomFilter(self.bloom_capacity, data=data)
+        # Missing, stale after a crash or sized for another capacity: rebuild it from the stored URLs.
+        for (url,) in self.conn.execute("SELECT url FROM urls"):
+            bloom.add(url)
+        return bloom
+
+    def add(self, url, depth=0):
+        """Queue a URL unless it was seen before or a limit is reached; returns whether it was queued"""
+        url = normalize_url(url)
+        host = urlsplit(url).netloc
+        if depth > self.max_depth or SKIPPED_EXTENSIONS.search(urlsplit(url).path):
+            return False
+        if self.max_pages is not None and self.total >= self.max_pages:
+            return False
+        if self.max_per_host is not None and self.hosts.get(host, 0) >= self.max_per_host:
+            return False
+        if not self.bloom.add(url):
+            return False
+        inserted = self.conn.execute("INSERT OR IGNORE INTO urls (url, host, depth) VALUES (?, ?, ?)",
+                                     (url, host, depth)).rowcount
+        if not inserted:
+            return False
+        self.hosts[host] = self.hosts.get(host, 0) + 1
+        self.total += 1
+        self._unsaved += 1
+        if self._unsaved >= 1000:
+            self.save()
+        return True
+
+    def pending(self):
+        """Yield queued URLs in FIFO order, including ones added while iterating"""
+        last_id = 0
+        while True:
+            row = self.conn.execute(
+                "SELECT id, url, depth FROM urls WHERE state = 'pending' AND id > ? ORDER BY id LIMIT 1", (last_id,)
+            ).fetchone()
+            if row is None:
+                return
+            last_id, url, depth = row
+            self.conn.execute("UPDATE urls SET state = 'in_progress' WHERE id = ?", (last_id,))
+            self.in_flight[url] = (last_id, depth)
+            yield url
+
+    def has_pending(self):
+        return self.conn.execute("SELECT 1 FROM urls WHERE state = 'pending' LIMIT 1").fetchone() is not None
+
+    def finish(self, url, state='done'):
+        """Mark a handed-out URL as done (or failed) and return its depth"""
+        row_id, depth = self.in_flight.pop(url)
+        self.conn.execute("UPDATE urls SET state = ? WHERE id = ?", (state, row_id))
+        # Also commits the links queued since, so a restart loses at most the pages in flight.
+        self.conn.commit()
+        return depth
+
+    def save(self):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('bloom', ?)", (bytes(self.bloom.bits),))
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('bloom_count', ?)", (self.total,))
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('bloom_size', ?)", (self.bloom.size,))
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('bloom_hashes', ?)", (self.bloom.hashes,))
+        self.conn.commit()
+        self._unsaved = 0
+
+    def stats(self):
+        counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"))
+        return {'urls': self.total, 'hosts': len(self.hosts), **counts}
+
+    def close(self):
+        self.save()
+        self.conn.close()
+
+
+def read_sitemap(session, url, timeout=10, max_sitemaps=1000):
+    """Yield page URLs from a sitemap, following sitemap indexes and gunzipping .gz files"""
+    queue, seen = [url], set()
+    while queue and len(seen) < max_sitemaps:
+        sitemap_url = queue.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        try:
+            response = session.get(sitemap_url, timeout=timeout)
+            response.raise_for_status()
+            data = response.content[:MAX_SITEMAP_BYTES]
+            if data[:2] == b'\x1f\x8b':
+                data = gzip.GzipFile(fileobj=io.BytesIO(data)).read(MAX_SITEMAP_BYTES)
+            root = ET.fromstring(data)
+        except Exception:
+            continue
+        locations = [element.text.strip() for element in root.iter() if element.tag.endswith('loc') and element.text]
+        if root.tag.endswith('sitemapindex'):
+            queue.extend(locations)
+        else:
+            yield from locations
+
+
+def is_sitemap(url):
+    return urlsplit(url).path.lower().endswith(('.xml', '.xml.gz'))
+
+
+async def crawl(frontier, out, researcher, workers=10, per_host=2, delay=0.0, same_host=True, include=None):
+    """Extract every frontier URL and queue the links it contains until the frontier is empty"""
+    allowed_hosts = set(frontier.hosts)
+    counts = {'ok': 0, 'failed': 0, 'queued': 0}
+    while frontier.has_pending():
+        async for url, result, error in researcher.extract_many(frontier.pending(), concurrency=workers,
+                                                                 per_host=per_host, delay=delay, links=True):
+            depth = frontier.finish(url, 'failed' if error else 'done')
+            record = {'url': url, 'depth': depth, 'content': None, 'source': None, 'error': None}
+            if error:
+                counts['failed'] += 1
+                record['error'] = str(error)
+            else:
+                counts['ok'] += 1
+                record['content'] = result['content']
+                record['source'] = result['source']
+                for link in result['links']:
+                    if same_host and urlsplit(link).netloc not in allowed_hosts:
+                        continue
+                    if include is not None and not include.search(link):
+                        continue
+                    if frontier.add(link, depth + 1):
+                        counts['queued'] += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+        frontier.save()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl sites from seed URLs or sitemaps and extract every page.")
+    parser.add_argument("seeds", nargs="*", help="start URLs; sitemap URLs (.xml, .xml.gz) are expanded")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout")
+    parser.add_argument("--db", metavar="PATH", help="SQLite file for the frontier; rerun with the same file to resume")
+    parser.add_argument("--max-depth", type=int, default=2, help="link hops to follow from a seed")
+    parser.add_argument("--max-pages", type=int, help="stop queueing after this many URLs in total")
+    parser.add_argument("--max-per-host", type=int, help="stop queueing a host after this many URLs")
+    parser.add_argument("--any-host", action="store_true", help="also follow links to hosts other than the seeds'")
+    parser.add_argument("--include", metavar="REGEX", help="only queue discovered links matching this pattern")
+    parser.add_argument("--bloom-capacity", type=int, default=1000000, help="URLs the dedup filter is sized for")
+    parser.add_argument("-w", "--workers", type=int, default=10, help="number of pages fetched concurrently")
+    parser.add_argument("--per-host", type=int, default=2, help="maximum parallel downloads per host")
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds between two downloads from the same host")
+    parser.add_argument("--cache", metavar="PATH", help="SQLite file used to cache and revalidate fetched pages")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache:
+        from http_cache import HttpCache
+        cache = HttpCache(args.cache)
+    researcher = ResearcherAgent(cache=cache)
+    frontier = Frontier(args.db, args.max_depth, args.max_pages, args.max_per_host, args.bloom_capacity)
+    for seed in args.seeds:
+        if is_sitemap(seed):
+            # Register the host even if the sitemap only lists already-known pages.
+            frontier.hosts.setdefault(urlsplit(normalize_url(seed)).netloc, 0)
+            for url in read_sitemap(researcher.session, seed, researcher.timeout):
+                frontier.add(url)
+        else:
+            frontier.add(seed)
+    frontier.save()
+
+    resume = bool(args.db) and args.output != '-'
+    out = sys.stdout if args.output == '-' else open(args.output, "a" if resume else "w", encoding="utf-8")
+    include = re.compile(args.include) if args.include else None
+    try:
+        counts = asyncio.run(crawl(frontier, out, researcher, args.workers, args.per_host, args.delay,
+                                   not args.any_host, include))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        print(f"frontier: {frontier.stats()}", file=sys.stderr)
+        frontier.close()
+        if cache is not None:
+            cache.close()
+    print(f"done: {counts['ok']} ok, {counts['failed']} failed, {counts['queued']} links queued", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import hashlib
+import re
+import sqlite3
+import threading
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def simhash(text, shingle_size=3):
+    """64-bit SimHash of the word shingles of a text"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    weights = [0] * BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [(band, fingerprint >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+
+def _to_signed(value):
+    # SQLite integers are signed 64-bit.
+    return value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+
+
+class NearDuplicateIndex:
+    """SimHash index mapping near-identical texts to an already generated summary
+
+    Fingerprints are split into four 16-bit bands; two fingerprints within
+    ``max_distance`` <= 3 bits share at least one band exactly, so only
+    texts in the same band buckets are compared. With a ``path`` the index
+    is persisted in SQLite and reloaded on start, otherwise it lives only for
+    the current process (e.g. one batch).
+    """
+
+    def __init__(self, path=None, max_distance=3, min_words=50):
+        self.max_distance = min(max_distance, BANDS - 1)
+        self.min_words = min_words
+        self.lookups = 0
+        self.matches = 0
+        self._buckets = {}
+        self._summaries = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS fingerprints (fingerprint INTEGER PRIMARY KEY, summary TEXT)")
+            self._conn.commit()
+            for fingerprint, summary in self._conn.execute("SELECT fingerprint, summary FROM fingerprints"):
+                self._insert(fingerprint % (1 << BITS), summary)
+
+    def _insert(self, fingerprint, summary):
+        if fingerprint not in self._summaries:
+            for band in _bands(fingerprint):
+                self._buckets.setdefault(band, []).append(fingerprint)
+        self._summaries[fingerprint] = summary
+
+    def usable(self, text):
+        return len(WORD_PATTERN.findall(text)) >= self.min_words
+
+    def find(self, text):
+        """Return (summary, distance) for the closest indexed near-duplicate, or None"""
+        if not self.usable(text):
+            return None
+        fingerprint = simhash(text)
+        best = None
+        with self._lock:
+            self.lookups += 1
+            for band in _bands(fingerprint):
+                for candidate in self._buckets.get(band, ()):
+                    distance = hamming(fingerprint, candidate)
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (self._summaries[candidate], distance)
+            if best is not None:
+                self.matches += 1
+        return best
+
+    def add(self, text, summary):
+        if not self.usable(text):
+            return
+        fingerprint = simhash(text)
+        with self._lock:
+            self._insert(fingerprint, summary)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO fingerprints VALUES (?, ?)", (_to_signed(fingerprint), summary))
+                self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._summaries), 'lookups': self.lookups, 'llm_calls_saved': self.matches}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
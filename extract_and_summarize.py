@@ -1,16 +1,78 @@
+import threading
 from researcher_agent import ResearcherAgent
 from summarizer_agent import SummarizerAgent
+from metrics import Metrics, stage_breakdown
 
-def extract_and_summarize(url):
-    researcher = ResearcherAgent()
-    summarizer = SummarizerAgent()
+# Shared by the warm agents; exporters can be appended to it at startup.
+pipeline_metrics = Metrics()
+_agents = None
+_agents_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def get_agents():
+    """Process-wide (researcher, summarizer) pair, created once and then kept warm
+
+    Reusing them keeps the HTTP session's connections, the robots.txt cache
+    and the LLM client alive between jobs instead of rebuilding them per URL.
+    """
+    global _agents
+    with _agents_lock:
+        if _agents is None:
+            _agents = (ResearcherAgent(metrics=pipeline_metrics), SummarizerAgent(metrics=pipeline_metrics))
+        return _agents
+
+
+def warm_up():
+    """Create the shared agents and load their heavy libraries ahead of the first job"""
+    researcher, summarizer = get_agents()
+    researcher.warm_up()
+    summarizer.warm_up()
+
+
+def extract_and_summarize(url, on_content=None, on_token=None, is_cancelled=None, on_stages=None):
+    """Extract and summarize a URL; the optional callbacks receive the extracted
+    content as soon as it is available and each summary token as it is generated.
+    ``is_cancelled`` is polled between stages and while tokens stream in, and
+    ``on_stages`` receives the seconds spent per stage once the job ends."""
+    researcher, summarizer = get_agents()
+    with pipeline_metrics.trace() as events:
+        try:
+            return _extract_and_summarize(researcher, summarizer, url, on_content, on_token, is_cancelled)
+        finally:
+            if on_stages is not None:
+                on_stages(stage_breakdown(events))
+
+
+def _extract_and_summarize(researcher, summarizer, url, on_content, on_token, is_cancelled):
+
+    def check_cancelled():
+        if is_cancelled is not None and is_cancelled():
+            raise JobCancelled("Job cancelled")
+
+    def forward_token(token):
+        check_cancelled()
+        if on_token is not None:
+            on_token(token)
 
     try:
+        check_cancelled()
         result = researcher.extract_content(url)
         content = result['content']
-        summary = summarizer.summarize(content)
+        check_cancelled()
+        if on_content is not None:
+            on_content(content)
+        summary = summarizer.summarize(content, on_token=forward_token if (on_token or is_cancelled) else None)
         return content, summary
+    except JobCancelled:
+        raise
     except Exception as e:
+        # The summarizer wraps errors raised from the token callback, so re-check here.
+        if is_cancelled is not None and is_cancelled():
+            raise JobCancelled("Job cancelled")
         raise Exception(f"Error processing URL: {str(e)}")
 
 if __name__ == "__main__":
@@ -18,4 +80,4 @@ if __name__ == "__main__":
     print(f"\nتست URL: {url}")
     content, summary = extract_and_summarize(url)
     print("\nContent:", content)
-    print("\nSummary:", summary)
\ No newline at end of file
+    print("\nSummary:", summary)
@@ -0,0 +1,119 @@
+"""Per-domain extractor statistics used to order the extraction fallback chain
+
+Every extractor attempt is recorded as (domain, extractor, success, seconds).
+``order`` sorts the extractors of a domain by their expected time to a
+usable result (mean seconds / smoothed success rate), so an extractor that
+keeps returning nothing on a site, or is much slower there, moves behind
+the others. With probability ``explore`` a random extractor is tried first
+instead, so the statistics of the others stay current.
+
+    python extractor_stats.py extractor_stats.sqlite   # print the learned table
+"""
+import argparse
+import json
+import random
+import sqlite3
+import threading
+from urllib.parse import urlsplit
+
+
+def domain_of(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class ExtractorStats:
+    def __init__(self, path=None, explore=0.1, prior_seconds=0.1, flush_every=50, seed=None):
+        self.explore = explore
+        # Untried extractors are assumed to succeed half the time in prior_seconds.
+        self.prior_seconds = prior_seconds
+        self.flush_every = flush_every
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._dirty = set()
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extractor_stats (
+                domain TEXT,
+                extractor TEXT,
+                attempts INTEGER,
+                successes INTEGER,
+                seconds REAL,
+                PRIMARY KEY (domain, extractor)
+            )
+        """)
+        self._conn.commit()
+        for domain, extractor, attempts, successes, seconds in self._conn.execute(
+                "SELECT domain, extractor, attempts, successes, seconds FROM extractor_stats"):
+            self._stats[(domain, extractor)] = [attempts, successes, seconds]
+
+    def record(self, domain, extractor, success, seconds):
+        with self._lock:
+            entry = self._stats.setdefault((domain, extractor), [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += 1 if success else 0
+            entry[2] += seconds
+            self._dirty.add((domain, extractor))
+            if len(self._dirty) >= self.flush_every:
+                self._flush()
+
+    def expected_cost(self, domain, extractor):
+        attempts, successes, seconds = self._stats.get((domain, extractor), (0, 0, 0.0))
+        success_rate = (successes + 1) / (attempts + 2)
+        mean_seconds = (seconds + self.prior_seconds) / (attempts + 1)
+        return mean_seconds / success_rate
+
+    def order(self, domain, names):
+        """Return ``names`` best-first for ``domain``; ties keep the given order"""
+        with self._lock:
+            ordered = sorted(names, key=lambda name: self.expected_cost(domain, name))
+        if len(ordered) > 1 and self._random.random() < self.explore:
+            ordered.insert(0, ordered.pop(self._random.randrange(1, len(ordered))))
+        return ordered
+
+    def report(self, domain=None):
+        """{domain: {extractor: {attempts, success_rate, mean_seconds, expected_cost}}}"""
+        report = {}
+        with self._lock:
+            for (entry_domain, extractor), (attempts, successes, seconds) in sorted(self._stats.items()):
+                if domain is not None and entry_domain != domain:
+                    continue
+                report.setdefault(entry_domain, {})[extractor] = {
+                    'attempts': attempts,
+                    'success_rate': successes / attempts if attempts else None,
+                    'mean_seconds': seconds / attempts if attempts else None,
+                    'expected_cost': self.expected_cost(entry_domain, extractor),
+                }
+        return report
+
+    def _flush(self):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO extractor_stats VALUES (?, ?, ?, ?, ?)",
+            [(domain, extractor, *self._stats[(domain, extractor)]) for domain, extractor in self._dirty],
+        )
+        self._conn.commit()
+        self._dirty.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the per-domain extractor statistics.")
+    parser.add_argument("path", help="SQLite file written by ResearcherAgent(extractor_stats=...)")
+    parser.add_argument("--domain", help="only show this domain")
+    args = parser.parse_args()
+    stats = ExtractorStats(args.path)
+    print(json.dumps(stats.report(args.domain), indent=2, ensure_ascii=False))
+    stats.close()
+
+
+if __name__ == "__main__":
+    main()
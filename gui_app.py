@@ -2,14 +2,20 @@ import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLineEdit, QPushButton, QTextEdit,
                              QLabel, QSplitter, QMessageBox, QFrame, QProgressBar,
-                             QStackedWidget, QFileDialog)
-from PyQt5.QtCore import Qt, pyqtSignal, QThread
-from PyQt5.QtGui import QFont, QIcon, QPalette, QColor
+                             QStackedWidget, QFileDialog, QListWidget, QListWidgetItem)
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QTimer
+from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QTextCursor
 
 try:
-    from extract_and_summarize import extract_and_summarize
+    from extract_and_summarize import extract_and_summarize, JobCancelled, warm_up
 except ImportError:
-    def extract_and_summarize(url):
+    class JobCancelled(Exception):
+        pass
+
+    def warm_up():
+        pass
+
+    def extract_and_summarize(url, on_content=None, on_token=None, is_cancelled=None, on_stages=None):
         raise ImportError("Could not find 'extract_and_summarize.py'. Please create it.")
 
 
@@ -83,6 +89,120 @@ class ThemedTextEdit(QTextEdit):
             }
         """)
 
+class LazyTextView(ThemedTextEdit):
+    """Read-only view that shows a long text as a sliding window of chunks
+
+    Chunks are appended (or prepended) one per event-loop iteration as the
+    user scrolls near the bottom (or top), so no single update takes more
+    than a frame. Once the document holds more than ``max_chars``, chunks
+    at the far end are dropped again, which caps the document's memory.
+    """
+
+    def __init__(self, parent=None, chunk_chars=4000, max_chars=200000):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        # The undo stack would otherwise keep a copy of every inserted chunk.
+        self.setUndoRedoEnabled(False)
+        self.chunk_chars = chunk_chars
+        self.max_chars = max_chars
+        self._text = ""
+        self._bounds = [0]
+        self._first = 0
+        self._last = 0
+        self._fill_scheduled = False
+        self.verticalScrollBar().valueChanged.connect(self.schedule_fill)
+
+    def set_content(self, text):
+        text = text or ""
+        if text == self._text:
+            return
+        self._text = text
+        self._bounds = [0]
+        self._first = self._last = 0
+        self.clear()
+        self.schedule_fill()
+
+    def clear_content(self):
+        self.set_content("")
+
+    def _chunk_end(self, start):
+        end = min(len(self._text), start + self.chunk_chars)
+        if end < len(self._text):
+            # Break on a space so words are not split across chunks.
+            space = self._text.rfind(' ', start + self.chunk_chars // 2, end)
+            if space != -1:
+                end = space + 1
+        return end
+
+    def _window_chars(self):
+        return self._bounds[self._last] - self._bounds[self._first]
+
+    def schedule_fill(self, *args):
+        if not self._fill_scheduled:
+            self._fill_scheduled = True
+            QTimer.singleShot(0, self.fill)
+
+    def fill(self):
+        """Load at most one chunk, then reschedule while the viewport is near an unloaded edge"""
+        self._fill_scheduled = False
+        bar = self.verticalScrollBar()
+        margin = max(bar.pageStep(), 1)
+        if self._bounds[self._last] < len(self._text) and bar.value() >= bar.maximum() - margin:
+            self.append_chunk()
+        elif self._first > 0 and bar.value() <= margin:
+            self.prepend_chunk()
+        else:
+            return
+        self.schedule_fill()
+
+    def append_chunk(self):
+        start = self._bounds[self._last]
+        if self._last + 1 == len(self._bounds):
+            self._bounds.append(self._chunk_end(start))
+        end = self._bounds[self._last + 1]
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        if self._last > self._first:
+            cursor.insertBlock()
+        cursor.insertText(self._text[start:end])
+        self._last += 1
+        if self._window_chars() > self.max_chars:
+            self._remove_block(first=True)
+            self._first += 1
+
+    def prepend_chunk(self):
+        self._first -= 1
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.Start)
+        cursor.insertText(self._text[self._bounds[self._first]:self._bounds[self._first + 1]])
+        cursor.insertBlock()
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.value() + int(self._block_height(self.document().firstBlock())))
+        if self._window_chars() > self.max_chars:
+            self._remove_block(first=False)
+            self._last -= 1
+
+    def _block_height(self, block):
+        return self.document().documentLayout().blockBoundingRect(block).height()
+
+    def _remove_block(self, first):
+        document = self.document()
+        block = document.firstBlock() if first else document.lastBlock()
+        height = self._block_height(block)
+        cursor = QTextCursor(block)
+        if first:
+            cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor)
+        else:
+            cursor.movePosition(QTextCursor.PreviousBlock)
+            cursor.movePosition(QTextCursor.EndOfBlock)
+            cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        if first:
+            # Keep the visible text in place after the content above it disappears.
+            bar = self.verticalScrollBar()
+            bar.setValue(bar.value() - int(height))
+
+
 class TitleLabel(QLabel):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
@@ -109,23 +229,66 @@ class SectionLabel(QLabel):
 
 
 class ProcessingThread(QThread):
-    finished = pyqtSignal(str, str, str)
+    content_ready = pyqtSignal(int, str)
+    summary_token = pyqtSignal(int, str)
+    finished = pyqtSignal(int, str, str, str)
+    cancelled = pyqtSignal(int)
+    stages_ready = pyqtSignal(int, object)
 
-    def __init__(self, url):
+    def __init__(self, job_id, url):
         super().__init__()
+        self.job_id = job_id
         self.url = url
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
 
     def run(self):
         try:
-            raw_content, summary = extract_and_summarize(self.url)
-            self.finished.emit(raw_content, summary, "")  
+            raw_content, summary = extract_and_summarize(
+                self.url,
+                on_content=lambda content: self.content_ready.emit(self.job_id, content),
+                on_token=lambda token: self.summary_token.emit(self.job_id, token),
+                is_cancelled=lambda: self.cancel_requested,
+                on_stages=lambda stages: self.stages_ready.emit(self.job_id, stages),
+            )
+            self.finished.emit(self.job_id, raw_content, summary, "")  
+        except JobCancelled:
+            self.cancelled.emit(self.job_id)
         except Exception as e:
-            self.finished.emit("", "", str(e))
+            self.finished.emit(self.job_id, "", "", str(e))
+
+
+class WarmUpThread(QThread):
+    def run(self):
+        try:
+            warm_up()
+        except Exception:
+            # Warm-up is best effort; a real job will report the problem.
+            pass
+
+
+class QueueListWidget(QListWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("""
+            QListWidget {
+                border: 1px solid #424242;
+                border-radius: 6px;
+                padding: 6px;
+                background-color: #2d2d2d;
+                color: #e0e0e0;
+                font-size: 13px;
+            }
+            QListWidget::item { padding: 6px; border-radius: 4px; }
+            QListWidget::item:selected { background-color: #00796b; color: white; }
+        """)
 
 
 
 class WebsiteSummarizer(QMainWindow):
-    def __init__(self):
+    def __init__(self, warm_up=True):
         super().__init__()
         self.setWindowTitle("Website Summarizer")
         self.setMinimumSize(1200, 800)
@@ -188,11 +351,47 @@ class WebsiteSummarizer(QMainWindow):
         self.stacked_widget.addWidget(self.results_widget)
         self.stacked_widget.setCurrentWidget(self.empty_state_widget)
 
+        self.create_queue_widget()
+        body_layout = QHBoxLayout()
+        body_layout.setSpacing(20)
+        body_layout.addWidget(self.queue_frame)
+        body_layout.addWidget(self.stacked_widget, 1)
+
 
         self.layout.addLayout(header_layout)
         self.layout.addWidget(url_frame)
         self.layout.addWidget(self.progress_bar)
-        self.layout.addWidget(self.stacked_widget, 1) 
+        self.layout.addLayout(body_layout, 1) 
+
+        self.stages_label = QLabel()
+        self.stages_label.setStyleSheet("color: #9e9e9e; font-size: 12px;")
+        self.stages_label.setWordWrap(True)
+        self.layout.addWidget(self.stages_label)
+
+        # Jobs run on a small fixed number of threads; the agents behind
+        # extract_and_summarize() are shared and stay warm between jobs.
+        self.max_running_jobs = 2
+        self.max_queued_jobs = 20
+        self.max_history = 50
+        self.jobs = {}
+        self.pending_jobs = []
+        self.next_job_id = 1
+        self.current_job_id = None
+
+        # Streamed tokens are buffered and rendered a few times per second
+        # instead of re-laying out the markdown for every single token.
+        self.token_timer = QTimer(self)
+        self.token_timer.setInterval(50)
+        self.token_timer.timeout.connect(self.flush_summary_tokens)
+
+        # Load extractors and the LLM client in the background once the window is up.
+        self.warm_up_thread = None
+        if warm_up:
+            QTimer.singleShot(0, self.start_warm_up)
+
+    def start_warm_up(self):
+        self.warm_up_thread = WarmUpThread()
+        self.warm_up_thread.start()
 
 
     def create_empty_state_widget(self):
@@ -229,8 +428,7 @@ class WebsiteSummarizer(QMainWindow):
         raw_title_layout.addWidget(SectionLabel("Raw Content"))
         raw_title_layout.addStretch()
 
-        self.raw_content_text = ThemedTextEdit()
-        self.raw_content_text.setReadOnly(True)
+        self.raw_content_text = LazyTextView()
         raw_content_layout.addLayout(raw_title_layout)
         raw_content_layout.addWidget(self.raw_content_text)
 
@@ -265,36 +463,210 @@ class WebsiteSummarizer(QMainWindow):
         layout.addWidget(splitter)
 
 
+    def create_queue_widget(self):
+        self.queue_frame = QFrame()
+        self.queue_frame.setFixedWidth(300)
+        self.queue_frame.setStyleSheet("background-color: #2d2d2d; border-radius: 8px;")
+        queue_layout = QVBoxLayout(self.queue_frame)
+
+        queue_title_layout = QHBoxLayout()
+        queue_title_layout.addWidget(SectionLabel("Jobs"))
+        queue_title_layout.addStretch()
+        self.cancel_button = ThemedButton("Cancel")
+        self.cancel_button.setIcon(QIcon.fromTheme("process-stop"))
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_selected_job)
+        queue_title_layout.addWidget(self.cancel_button)
+
+        self.queue_list = QueueListWidget()
+        self.queue_list.currentItemChanged.connect(self.on_job_selected)
+
+        queue_layout.addLayout(queue_title_layout)
+        queue_layout.addWidget(self.queue_list)
+
     def start_processing(self):
         url = self.url_input.text().strip()
         if not url:
             QMessageBox.warning(self, "Input Error", "Please enter a URL to process.")
             return
+        if len(self.pending_jobs) >= self.max_queued_jobs:
+            QMessageBox.warning(self, "Queue Full", "Too many jobs are waiting. Please wait for some to finish.")
+            return
 
-        self.load_button.setText("Loading...")
-        self.load_button.setEnabled(False)
-        self.url_input.setEnabled(False)
-        self.progress_bar.setVisible(True)
-        self.raw_content_text.clear()
-        self.summary_text.clear()
-
-        self.thread = ProcessingThread(url)
-        self.thread.finished.connect(self.on_processing_finished)
-        self.thread.start()
-
-    def on_processing_finished(self, raw_content, summary, error_message):
-        self.load_button.setText("Summarize")
-        self.load_button.setEnabled(True)
-        self.url_input.setEnabled(True)
-        self.progress_bar.setVisible(False)
+        job = {
+            'id': self.next_job_id,
+            'url': url,
+            'status': 'queued',
+            'thread': None,
+            'content': "",
+            'summary': "",
+            'error': "",
+            'pending_tokens': [],
+            'stages': {},
+            'item': QListWidgetItem(),
+        }
+        self.next_job_id += 1
+        self.jobs[job['id']] = job
+        job['item'].setData(Qt.UserRole, job['id'])
+        self.queue_list.insertItem(0, job['item'])
+        self.update_job_item(job)
+        self.pending_jobs.append(job['id'])
+        self.url_input.clear()
+
+        self.queue_list.setCurrentItem(job['item'])
+        self.run_pending_jobs()
+
+    def run_pending_jobs(self):
+        running = sum(1 for job in self.jobs.values() if job['status'] == 'running')
+        while self.pending_jobs and running < self.max_running_jobs:
+            job = self.jobs[self.pending_jobs.pop(0)]
+            thread = ProcessingThread(job['id'], job['url'])
+            thread.content_ready.connect(self.on_content_ready)
+            thread.summary_token.connect(self.on_summary_token)
+            thread.finished.connect(self.on_processing_finished)
+            thread.cancelled.connect(self.on_processing_cancelled)
+            thread.stages_ready.connect(self.on_stages_ready)
+            job['thread'] = thread
+            job['status'] = 'running'
+            self.update_job_item(job)
+            thread.start()
+            running += 1
+        self.progress_bar.setVisible(running > 0)
+        if running:
+            self.token_timer.start()
+        else:
+            self.token_timer.stop()
+        self.update_cancel_button()
+
+    def update_job_item(self, job):
+        job['item'].setText(f"[{job['status']}] {job['url']}")
+        job['item'].setToolTip(job['error'] or job['url'])
+
+    def update_cancel_button(self):
+        job = self.jobs.get(self.current_job_id)
+        self.cancel_button.setEnabled(bool(job) and job['status'] in ('queued', 'running'))
+
+    def finish_job(self, job, status):
+        job['status'] = status
+        job['pending_tokens'] = []
+        if job['thread'] is not None:
+            job['thread'].wait()
+            job['thread'] = None
+        self.update_job_item(job)
+        self.trim_history()
+        self.run_pending_jobs()
+
+    def trim_history(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in ('done', 'failed', 'cancelled')]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            job = self.jobs.pop(job_id)
+            self.queue_list.takeItem(self.queue_list.row(job['item']))
+
+    def cancel_selected_job(self):
+        job = self.jobs.get(self.current_job_id)
+        if not job:
+            return
+        if job['status'] == 'queued':
+            self.pending_jobs.remove(job['id'])
+            self.finish_job(job, 'cancelled')
+            self.show_job(job)
+        elif job['status'] == 'running':
+            job['thread'].cancel()
+            job['status'] = 'cancelling'
+            self.update_job_item(job)
+            self.update_cancel_button()
+
+    def on_job_selected(self, item, previous=None):
+        self.current_job_id = item.data(Qt.UserRole) if item else None
+        self.show_job(self.jobs.get(self.current_job_id))
+        self.update_cancel_button()
+
+    def show_stages(self, job):
+        if not job or not job['stages']:
+            self.stages_label.clear()
+            return
+        total = sum(job['stages'].values())
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in job['stages'].items()]
+        self.stages_label.setText(f"Stages ({total:.2f}s total): " + "  ·  ".join(parts))
+
+    def on_stages_ready(self, job_id, stages):
+        job = self.jobs.get(job_id)
+        if job:
+            job['stages'] = stages
+            if job_id == self.current_job_id:
+                self.show_stages(job)
+
+    def show_job(self, job):
+        self.show_stages(job)
+        if job is None or not (job['content'] or job['summary']):
+            self.raw_content_text.clear_content()
+            self.summary_text.clear()
+            self.stacked_widget.setCurrentWidget(self.empty_state_widget)
+            return
+        self.raw_content_text.set_content(job['content'])
+        self.summary_text.setMarkdown(job['summary'])
+        self.stacked_widget.setCurrentWidget(self.results_widget)
 
+    def on_content_ready(self, job_id, raw_content):
+        job = self.jobs.get(job_id)
+        if not job:
+            return
+        job['content'] = raw_content
+        if job_id == self.current_job_id:
+            self.show_job(job)
+
+    def on_summary_token(self, job_id, token):
+        job = self.jobs.get(job_id)
+        if job:
+            job['pending_tokens'].append(token)
+
+    def flush_summary_tokens(self):
+        for job in self.jobs.values():
+            if not job['pending_tokens']:
+                continue
+            job['summary'] += "".join(job['pending_tokens'])
+            job['pending_tokens'] = []
+            if job['id'] == self.current_job_id:
+                self.summary_text.setMarkdown(job['summary'])
+                self.summary_text.verticalScrollBar().setValue(self.summary_text.verticalScrollBar().maximum())
+
+    def on_processing_finished(self, job_id, raw_content, summary, error_message):
+        job = self.jobs.get(job_id)
+        if not job:
+            return
+        job['error'] = error_message
+        if not error_message:
+            job['content'] = raw_content
+            job['summary'] = summary
+        self.finish_job(job, 'failed' if error_message else 'done')
+
+        if job_id != self.current_job_id:
+            return
         if error_message:
             QMessageBox.critical(self, "Processing Error", f"An error occurred:\n{error_message}")
             self.stacked_widget.setCurrentWidget(self.empty_state_widget)
         else:
-            self.raw_content_text.setText(raw_content)
-            self.summary_text.setMarkdown(summary)
-            self.stacked_widget.setCurrentWidget(self.results_widget)
+            self.show_job(job)
+
+    def on_processing_cancelled(self, job_id):
+        job = self.jobs.get(job_id)
+        if job:
+            self.finish_job(job, 'cancelled')
+            if job_id == self.current_job_id:
+                self.show_job(job)
+                self.update_cancel_button()
+
+    def closeEvent(self, event):
+        if self.warm_up_thread is not None:
+            self.warm_up_thread.wait()
+        self.pending_jobs = []
+        for job in self.jobs.values():
+            if job['thread'] is not None:
+                job['thread'].cancel()
+        for job in self.jobs.values():
+            if job['thread'] is not None:
+                job['thread'].wait()
+        super().closeEvent(event)
 
     def download_summary(self):
         if not self.summary_text.toPlainText():
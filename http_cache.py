@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """Canonical form of a URL used as cache key: lowercase host, no fragment, sorted query"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+class HttpCache:
+    """SQLite-backed cache of fetched pages and their extraction results
+
+    Pages are stored with their ETag/Last-Modified validators so later
+    fetches can be made conditional; on a 304 the stored extraction is
+    reused without parsing again. Entries older than ``max_age`` seconds
+    are dropped and the least recently used ones are evicted once the
+    stored bodies exceed ``max_bytes``.
+    """
+
+    def __init__(self, path="http_cache.sqlite", max_bytes=256 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                html BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                result TEXT,
+                size INTEGER,
+                stored_at REAL,
+                used_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, url):
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html, etag, last_modified, result, stored_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time.time() - row[4] > self.max_age:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE pages SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        html, etag, last_modified, result, _ = row
+        return {
+            'html': zlib.decompress(html).decode('utf-8'),
+            'etag': etag,
+            'last_modified': last_modified,
+            'result': json.loads(result) if result else None,
+        }
+
+    def validators(self, entry):
+        """Conditional request headers for a cached entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, html, etag=None, last_modified=None, result=None):
+        html = zlib.compress(html.encode('utf-8'))
+        result = json.dumps(result, ensure_ascii=False) if result is not None else None
+        size = len(html) + len(result or '')
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), url, html, etag, last_modified, result, size, now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            evict = self._writes % 100 == 0
+        if evict:
+            self.evict()
+
+    def touch(self, url):
+        """Mark a cached entry as freshly revalidated (e.g. after a 304)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE pages SET stored_at = ?, used_at = ? WHERE key = ?", (now, now, normalize_url(url)))
+            self._conn.commit()
+
+    def evict(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE stored_at < ?", (time.time() - self.max_age,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from the least recently used entry until we are back under budget.
+                for key, size in self._conn.execute("SELECT key, size FROM pages ORDER BY used_at").fetchall():
+                    self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'entries': count, 'bytes': size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,93 @@
+"""Fast, deterministic language detection for routing documents
+
+Only the first ``prefix_chars`` characters are looked at. Text that is
+mostly Persian/Arabic script is Persian ('fa'); mostly Latin text is English
+('en') when enough common English words occur in it. Anything else (mixed
+scripts, other Latin languages) is handed to langdetect with a fixed seed, if
+it is installed. ``None`` means unknown, for which callers use their generic,
+language-agnostic handling. Results are cached per hash of the prefix read.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+PERSIAN_LETTERS = re.compile(r'[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]')
+LATIN_LETTERS = re.compile(r'[A-Za-z\u00C0-\u024F]')
+LATIN_WORD = re.compile(r'[A-Za-z]+')
+ENGLISH_WORDS = frozenset(
+    "the of and to in is that for it as was with be by on not are this at from or have an they which "
+    "but has were their been its had will would there can more also than".split()
+)
+
+
+class LanguageDetector:
+    """Script-ratio detection with an English stop-word check and an LRU cache"""
+
+    def __init__(self, prefix_chars=2000, min_letters=20, script_ratio=0.7, english_ratio=0.12, max_entries=10000):
+        self.prefix_chars = prefix_chars
+        # Fewer letters than this (e.g. a table of numbers) is not enough to decide.
+        self.min_letters = min_letters
+        self.script_ratio = script_ratio
+        self.english_ratio = english_ratio
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def detect(self, text):
+        """Return 'fa', 'en', another ISO 639-1 code from langdetect, or None"""
+        prefix = (text or "")[:self.prefix_chars]
+        key = hashlib.blake2b(prefix.encode('utf-8'), digest_size=16).digest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+        language = self._detect(prefix)
+        with self._lock:
+            self._cache[key] = language
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return language
+
+    def _detect(self, prefix):
+        persian = len(PERSIAN_LETTERS.findall(prefix))
+        latin = len(LATIN_LETTERS.findall(prefix))
+        letters = persian + latin
+        if letters < self.min_letters:
+            return None
+        if persian / letters >= self.script_ratio:
+            return 'fa'
+        if latin / letters >= self.script_ratio:
+            words = LATIN_WORD.findall(prefix.lower())
+            if words and sum(word in ENGLISH_WORDS for word in words) / len(words) >= self.english_ratio:
+                return 'en'
+        return self._langdetect(prefix)
+
+    def _langdetect(self, prefix):
+        try:
+            from langdetect import DetectorFactory, detect
+            from langdetect.lang_detect_exception import LangDetectException
+        except ImportError:
+            return None
+        # langdetect samples randomly; a fixed seed makes it give the same answer every time.
+        DetectorFactory.seed = 0
+        try:
+            return detect(prefix)
+        except LangDetectException:
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+_detector = LanguageDetector()
+
+
+def detect_language(text):
+    """Detect with the shared process-wide detector"""
+    return _detector.detect(text)
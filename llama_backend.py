@@ -0,0 +1,162 @@
+"""In-process llama.cpp backend for SummarizerAgent
+
+The GGUF model is loaded once per process (see ``get_backend``) and every
+generation goes through a single worker thread, since one llama.cpp
+context can only evaluate one sequence at a time. Before each request the
+worker restores the saved KV state of the prompt's fixed instruction
+prefix, so llama.cpp's own prefix matching only has to evaluate the
+document text instead of the whole prompt.
+"""
+import queue
+import threading
+from typing import Any, Iterator, List, Optional
+
+from langchain.llms.base import LLM
+from langchain_core.outputs import GenerationChunk
+
+_backends = {}
+_backends_lock = threading.Lock()
+_DONE = object()
+
+
+class _Request:
+    def __init__(self, prompt, stop):
+        self.prompt = prompt
+        self.stop = stop
+        self.tokens = queue.Queue()
+        self.cancelled = False
+
+
+class LlamaBackend:
+    def __init__(self, model_path, n_ctx=4096, n_threads=None, temperature=0.7, max_tokens=1024, verbose=False):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.verbose = verbose
+        self.requests = 0
+        self.prefix_hits = 0
+        self._model = None
+        self._prefixes = []
+        self._states = {}
+        self._active_prefix = None
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def register_prefix(self, template):
+        """Cache the KV state of the text before ``{content}`` in a prompt template"""
+        prefix = template.split("{content}")[0]
+        # End on a line break so the prefix tokenizes the same way inside the full prompt.
+        prefix = prefix[:prefix.rfind("\n") + 1]
+        if prefix and prefix not in self._prefixes:
+            self._prefixes.append(prefix)
+
+    def start(self):
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="llama-worker", daemon=True)
+                self._worker.start()
+
+    def load_model(self):
+        if self._model is None:
+            from llama_cpp import Llama
+            self._model = Llama(model_path=self.model_path, n_ctx=self.n_ctx, n_threads=self.n_threads,
+                                verbose=self.verbose)
+        return self._model
+
+    def stream(self, prompt, stop=None):
+        """Queue a prompt and yield the generated text piece by piece"""
+        self.start()
+        request = _Request(prompt, stop)
+        self._queue.put(request)
+        try:
+            while True:
+                item = request.tokens.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Stops the worker early if the consumer gave up (e.g. a cancelled job).
+            request.cancelled = True
+
+    def generate(self, prompt, stop=None):
+        return "".join(self.stream(prompt, stop))
+
+    def _run(self):
+        while True:
+            request = self._queue.get()
+            try:
+                model = self.load_model()
+                self._restore_prefix(model, request.prompt)
+                self.requests += 1
+                for chunk in model.create_completion(request.prompt, max_tokens=self.max_tokens,
+                                                     temperature=self.temperature, stop=request.stop, stream=True):
+                    if request.cancelled:
+                        break
+                    request.tokens.put(chunk["choices"][0]["text"])
+            except Exception as e:
+                request.tokens.put(e)
+            request.tokens.put(_DONE)
+
+    def _restore_prefix(self, model, prompt):
+        matches = [prefix for prefix in self._prefixes if prompt.startswith(prefix)]
+        if not matches:
+            self._active_prefix = None
+            return
+        prefix = max(matches, key=len)
+        state = self._states.get(prefix)
+        if state is None:
+            model.reset()
+            model.eval(model.tokenize(prefix.encode("utf-8"), add_bos=True))
+            self._states[prefix] = model.save_state()
+        elif self._active_prefix != prefix:
+            model.load_state(state)
+            self.prefix_hits += 1
+        else:
+            # The context still starts with this prefix from the previous request.
+            self.prefix_hits += 1
+        self._active_prefix = prefix
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'prefix_hits': self.prefix_hits,
+            'cached_prefixes': len(self._states),
+            'queued': self._queue.qsize(),
+        }
+
+
+def get_backend(model_path, **kwargs):
+    """Process-wide LlamaBackend per model file, so the weights are only loaded once"""
+    with _backends_lock:
+        backend = _backends.get(model_path)
+        if backend is None:
+            backend = _backends[model_path] = LlamaBackend(model_path, **kwargs)
+        return backend
+
+
+class LlamaCppLLM(LLM):
+    """langchain LLM adapter so the existing chains can run on a LlamaBackend"""
+
+    backend: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "llama_cpp_resident"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        parts = []
+        for chunk in self._stream(prompt, stop, run_manager, **kwargs):
+            parts.append(chunk.text)
+        return "".join(parts)
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[GenerationChunk]:
+        for text in self.backend.stream(prompt, stop):
+            if run_manager is not None:
+                run_manager.on_llm_new_token(text)
+            yield GenerationChunk(text=text)
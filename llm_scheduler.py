@@ -0,0 +1,187 @@
+"""Pooled Ollama client and a bounded summarization scheduler
+
+``OllamaClient`` keeps a pool of keep-alive connections to the Ollama
+server, caps the number of generate requests in flight (including the
+parallel chunk requests of long documents) and retries overloaded or
+failed requests with exponential backoff. ``SummaryScheduler`` feeds
+documents to a summarizer from a bounded queue; ``submit`` waits while the
+queue is full, which pushes back on the extraction stage.
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from langchain.llms.base import LLM
+from langchain_core.outputs import GenerationChunk
+
+from resilience import RETRY_STATUSES
+
+
+class OllamaClient:
+    def __init__(self, base_url="http://localhost:11434", model="llama3.2", temperature=0.7, max_in_flight=4,
+                 timeout=120, retries=2, backoff=0.5, connect_timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.temperature = temperature
+        self.max_in_flight = max_in_flight
+        # Seconds at most between two streamed chunks and for the whole request.
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'retries': 0, 'failures': 0, 'in_flight': 0}
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counts[name] += value
+
+    def stream(self, prompt, stop=None):
+        """Yield generated text for a prompt, retrying as long as nothing has been yielded yet"""
+        payload = {"model": self.model, "prompt": prompt, "stream": True,
+                   "options": {"temperature": self.temperature}}
+        if stop:
+            payload["options"]["stop"] = stop
+
+        with self._slots:
+            self._count('in_flight')
+            try:
+                for attempt in range(self.retries + 1):
+                    self._count('requests')
+                    started = False
+                    try:
+                        for text in self._generate(payload):
+                            started = True
+                            yield text
+                        return
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, _Retryable) as e:
+                        # Text already handed to the caller cannot be taken back.
+                        if started or attempt == self.retries:
+                            self._count('failures')
+                            raise self.translate_error(e)
+                        self._count('retries')
+                        time.sleep(self.backoff * 2 ** attempt)
+            finally:
+                self._count('in_flight', -1)
+
+    def generate(self, prompt, stop=None):
+        return "".join(self.stream(prompt, stop))
+
+    def _generate(self, payload):
+        deadline = time.monotonic() + self.timeout
+        with self.session.post(f"{self.base_url}/api/generate", json=payload, stream=True,
+                               timeout=(self.connect_timeout, self.timeout)) as response:
+            if response.status_code in RETRY_STATUSES:
+                raise _Retryable(f"HTTP {response.status_code}")
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if time.monotonic() > deadline:
+                    raise requests.exceptions.Timeout(f"request took longer than {self.timeout}s")
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise Exception(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+
+    def translate_error(self, error):
+        if isinstance(error, requests.exceptions.Timeout):
+            return TimeoutError(f"پاسخ مدل زبانی در زمان مقرر دریافت نشد: {error}")
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return ConnectionError(f"خطا در اتصال به سرور مدل زبانی: {error}")
+        return Exception(f"سرور مدل زبانی در دسترس نیست: {error}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def close(self):
+        self.session.close()
+
+
+class _Retryable(Exception):
+    pass
+
+
+class OllamaClientLLM(LLM):
+    """langchain LLM adapter so the existing chains run on a pooled OllamaClient"""
+
+    client: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama_pooled"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[GenerationChunk]:
+        for text in self.client.stream(prompt, stop):
+            if run_manager is not None:
+                run_manager.on_llm_new_token(text)
+            yield GenerationChunk(text=text)
+
+
+class SummaryScheduler:
+    """Runs summarization jobs on ``workers`` threads behind a queue of at most ``max_queued`` jobs
+
+    Must be used from within a running event loop.
+    """
+
+    def __init__(self, workers=4, max_queued=8):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summarize")
+        self._queue = asyncio.Queue(maxsize=max_queued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            future, fn, args = await self._queue.get()
+            try:
+                if future.done():
+                    # Cancelled by the caller while it waited in the queue.
+                    continue
+                try:
+                    result = await loop.run_in_executor(self.executor, fn, *args)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    async def submit(self, fn, *args):
+        """Queue ``fn(*args)``; waits while the queue is full and returns a future of the result"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((future, fn, args))
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    async def join(self):
+        await self._queue.join()
+
+    async def close(self):
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.executor.shutdown()
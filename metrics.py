@@ -0,0 +1,192 @@
+"""Lightweight span/counter instrumentation for the agents
+
+Agents call ``metrics.span(name)`` around each stage and ``metrics.count``
+for discrete events. ``NULL_METRICS`` (the default) does nothing, so the
+cost when disabled is one attribute lookup and an empty ``with`` block.
+A ``Metrics`` instance forwards every event to its exporters and to the
+list opened by ``Metrics.trace()`` in the current context, which is how
+the GUI gets a per-job stage breakdown.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+_current_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullMetrics:
+    enabled = False
+
+    def span(self, name, **attrs):
+        return _NULL_SPAN
+
+    def count(self, name, value=1, **attrs):
+        pass
+
+    @contextmanager
+    def trace(self):
+        yield []
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Span:
+    def __init__(self, metrics, name, attrs):
+        self.metrics = metrics
+        self.name = name
+        self.attrs = attrs
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.metrics.emit({
+            'type': 'span',
+            'name': self.name,
+            'seconds': time.perf_counter() - self.started,
+            'attrs': self.attrs,
+        })
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self, exporters=()):
+        self.exporters = list(exporters)
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def count(self, name, value=1, **attrs):
+        self.emit({'type': 'counter', 'name': name, 'value': value, 'attrs': attrs})
+
+    def emit(self, event):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.append(event)
+        for exporter in self.exporters:
+            exporter.export(event)
+
+    @contextmanager
+    def trace(self):
+        """Collect every event emitted in this context (and contexts copied from it)"""
+        events = []
+        token = _current_trace.set(events)
+        try:
+            yield events
+        finally:
+            _current_trace.reset(token)
+
+
+def stage_breakdown(events):
+    """Total seconds per span name, in first-seen order"""
+    totals = {}
+    for event in events:
+        if event['type'] == 'span':
+            totals[event['name']] = totals.get(event['name'], 0.0) + event['seconds']
+    return totals
+
+
+class LogExporter:
+    """Writes every event as one JSON object through the logging module"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("metrics")
+        self.level = level
+
+    def export(self, event):
+        self.logger.log(self.level, json.dumps(event, ensure_ascii=False, default=str))
+
+
+class PrometheusExporter:
+    """Aggregates events and renders them in the Prometheus text exposition format
+
+    Spans become ``<prefix>_stage_seconds`` count/sum pairs labelled by stage;
+    numeric span attributes (bytes, chars, tokens...) are summed into
+    ``<prefix>_stage_<attr>_total``; string attributes become labels.
+    """
+
+    def __init__(self, prefix="scraper"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stage_seconds = {}
+        self._stage_totals = {}
+        self._counters = {}
+
+    def export(self, event):
+        labels = {key: value for key, value in event['attrs'].items() if isinstance(value, str)}
+        with self._lock:
+            if event['type'] == 'span':
+                key = self._key({'stage': event['name'], **labels})
+                count, total = self._stage_seconds.get(key, (0, 0.0))
+                self._stage_seconds[key] = (count + 1, total + event['seconds'])
+                for attr, value in event['attrs'].items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        metric = (attr, self._key({'stage': event['name']}))
+                        self._stage_totals[metric] = self._stage_totals.get(metric, 0) + value
+            else:
+                key = (event['name'], self._key(labels))
+                self._counters[key] = self._counters.get(key, 0) + event['value']
+
+    def _key(self, labels):
+        return tuple(sorted(labels.items()))
+
+    def _labels(self, key):
+        if not key:
+            return ""
+        return "{" + ",".join(f'{name}="{self._escape(value)}"' for name, value in key) + "}"
+
+    def _escape(self, value):
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    def render(self):
+        lines = []
+        with self._lock:
+            name = f"{self.prefix}_stage_seconds"
+            lines.append(f"# TYPE {name} summary")
+            for key, (count, total) in sorted(self._stage_seconds.items()):
+                lines.append(f"{name}_count{self._labels(key)} {count}")
+                lines.append(f"{name}_sum{self._labels(key)} {total}")
+            for attr in sorted({attr for attr, _ in self._stage_totals}):
+                name = f"{self.prefix}_stage_{attr}_total"
+                lines.append(f"# TYPE {name} counter")
+                for (metric_attr, key), value in sorted(self._stage_totals.items()):
+                    if metric_attr == attr:
+                        lines.append(f"{name}{self._labels(key)} {value}")
+            for counter in sorted({counter for counter, _ in self._counters}):
+                name = f"{self.prefix}_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                for (metric_name, key), value in sorted(self._counters.items()):
+                    if metric_name == counter:
+                        lines.append(f"{name}{self._labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render())
@@ -0,0 +1,189 @@
+"""Change monitoring: re-check URLs and only re-summarize what changed
+
+The cleaned text and summary of every URL are kept in SQLite. On the next
+check the new text is diffed against the stored one sentence by sentence
+(``clean_text`` collapses line breaks, so sentences are the smallest stable
+unit). Unchanged pages skip the LLM; pages with a small change get their
+stored summary revised from the added and removed passages in one request.
+
+    python monitor.py urls.txt --db monitor.sqlite -o changes.jsonl
+"""
+import argparse
+import asyncio
+import difflib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from researcher_agent import ResearcherAgent
+
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?؟])\s+')
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+
+def diff_sections(old_text, new_text):
+    """Return (added, removed, changed_ratio): runs of sentences inserted and deleted between two texts"""
+    old = split_sentences(old_text)
+    new = split_sentences(new_text)
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    added, removed = [], []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ('replace', 'delete'):
+            removed.append(' '.join(old[i1:i2]))
+        if tag in ('replace', 'insert'):
+            added.append(' '.join(new[j1:j2]))
+    changed = sum(len(section) for section in added) + sum(len(section) for section in removed)
+    return added, removed, changed / max(len(new_text), len(old_text), 1)
+
+
+class MonitorStore:
+    def __init__(self, path="monitor.sqlite"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    content TEXT,
+                    summary TEXT,
+                    checked_at REAL,
+                    changed_at REAL
+                )
+            """)
+            self.conn.commit()
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute("SELECT content, summary, checked_at, changed_at FROM pages WHERE url = ?",
+                                    (url,)).fetchone()
+        if row is None:
+            return None
+        content, summary, checked_at, changed_at = row
+        return {'content': content, 'summary': summary, 'checked_at': checked_at, 'changed_at': changed_at}
+
+    def put(self, url, content, summary, changed):
+        now = time.time()
+        with self.lock:
+            if changed:
+                self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                                  (url, content, summary, now, now))
+            else:
+                self.conn.execute("UPDATE pages SET checked_at = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class PageMonitor:
+    """Decides per URL between skipping, patching and fully re-generating the summary
+
+    Changes touching more than ``max_changed_ratio`` of the text, or too long
+    to fit one LLM request, are summarized from scratch instead of patched.
+    """
+
+    def __init__(self, summarizer, store, max_changed_ratio=0.4):
+        self.summarizer = summarizer
+        self.store = store
+        self.max_changed_ratio = max_changed_ratio
+        self.llm_calls = 0
+        self.llm_calls_avoided = 0
+
+    def update(self, url, content):
+        previous = self.store.get(url)
+        full_calls = self.summarizer.llm_calls(content)
+        record = {'url': url, 'status': None, 'summary': None, 'added': [], 'removed': [],
+                  'llm_calls': 0, 'llm_calls_avoided': 0}
+
+        if previous is not None and previous['content'] == content and previous['summary']:
+            record['status'] = 'unchanged'
+            record['summary'] = previous['summary']
+            record['llm_calls_avoided'] = full_calls
+            self.store.put(url, content, previous['summary'], changed=False)
+        else:
+            added, removed, ratio = [], [], 1.0
+            if previous is not None and previous['summary']:
+                added, removed, ratio = diff_sections(previous['content'], content)
+            patch = '\n'.join(added + removed)
+            if ratio <= self.max_changed_ratio and self.summarizer.estimate_tokens(patch) <= self.summarizer.chunk_tokens:
+                record['status'] = 'patched'
+                record['summary'] = self.summarizer.update_summary(previous['summary'], added, removed)
+                record['llm_calls'] = 1
+                record['llm_calls_avoided'] = max(0, full_calls - 1)
+            else:
+                record['status'] = 'new' if previous is None else 'rewritten'
+                stats = self.summarizer.summarize_with_stats(content)
+                record['summary'] = stats['summary']
+                record['llm_calls'] = 0 if stats['cached'] or stats['near_duplicate'] is not None else full_calls
+            record['added'] = added
+            record['removed'] = removed
+            self.store.put(url, content, record['summary'], changed=True)
+
+        self.llm_calls += record['llm_calls']
+        self.llm_calls_avoided += record['llm_calls_avoided']
+        return record
+
+
+async def run(urls, out, monitor, workers=10, per_host=2, researcher=None):
+    researcher = researcher or ResearcherAgent()
+    loop = asyncio.get_running_loop()
+    changed, counts = [], {'unchanged': 0, 'patched': 0, 'rewritten': 0, 'new': 0, 'failed': 0}
+    async for url, result, error in researcher.extract_many(urls, concurrency=workers, per_host=per_host):
+        if error is None:
+            try:
+                record = await loop.run_in_executor(None, monitor.update, url, result['content'])
+            except Exception as e:
+                error = e
+        if error is not None:
+            record = {'url': url, 'status': 'failed', 'error': str(error)}
+        counts[record['status']] += 1
+        if record['status'] in ('patched', 'rewritten'):
+            changed.append(url)
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+    return counts, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-check URLs and re-summarize only the pages that changed.")
+    parser.add_argument("input", nargs="?", default="-", help="file with one URL per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL report file, or - for stdout")
+    parser.add_argument("--db", default="monitor.sqlite", help="SQLite file holding the last text and summary per URL")
+    parser.add_argument("-w", "--workers", type=int, default=10, help="number of URLs downloaded concurrently")
+    parser.add_argument("--per-host", type=int, default=2, help="maximum parallel downloads per host")
+    parser.add_argument("--llm-url", default="http://localhost:11434", help="base URL of the Ollama server")
+    parser.add_argument("--max-change", type=float, default=0.4,
+                        help="share of changed text above which the summary is regenerated instead of patched")
+    args = parser.parse_args()
+
+    from summarizer_agent import SummarizerAgent
+    from batch_extract import read_urls
+
+    store = MonitorStore(args.db)
+    monitor = PageMonitor(SummarizerAgent(base_url=args.llm_url, verbose=False), store, args.max_change)
+    source = sys.stdin if args.input == '-' else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == '-' else open(args.output, "w", encoding="utf-8")
+    try:
+        counts, changed = asyncio.run(run(read_urls(source), out, monitor, args.workers, args.per_host))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        store.close()
+
+    print(", ".join(f"{count} {status}" for status, count in counts.items()), file=sys.stderr)
+    for url in changed:
+        print(f"changed: {url}", file=sys.stderr)
+    print(f"llm calls: {monitor.llm_calls} made, {monitor.llm_calls_avoided} avoided", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
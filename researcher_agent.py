@@ -1,15 +1,69 @@
 import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-import trafilatura
-from langdetect import detect
+import codecs
+import html as html_lib
 import re
-from urllib.robotparser import RobotFileParser
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 import time
+import threading
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from robots_cache import RobotsCache
+from metrics import NULL_METRICS
+from http_cache import normalize_url
+from extractor_stats import domain_of
+from resilience import Resilience, CircuitOpenError
+from thread_pools import GrowingThreadPool
+from language import detect_language
+
+BOILERPLATE_PATTERN = re.compile(
+    r'cookie|subscribe|sign up|log ?in|newsletter|advertisement|all rights reserved|privacy policy'
+    r'|کوکی|اشتراک|عضویت|ورود|تبلیغات|کلیه حقوق|حریم خصوصی',
+    re.IGNORECASE,
+)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+ANCHOR_PATTERN = re.compile(r'<a\b[^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+HREF_PATTERN = re.compile(r'<a\b[^>]*?\bhref\s*=\s*["\']?([^"\'\s>]+)', re.IGNORECASE)
+
+# Characters kept by clean_text per detected language; the default set is used when it is unknown.
+# Persian keeps the zero-width non-joiner (it separates prefixes like می‌ from the verb) and guillemets,
+# English keeps apostrophes, quotes, hyphens and parentheses.
+CLEAN_PATTERNS = {
+    'fa': re.compile(r'[^\u0600-\u06FF\u0750-\u077F\u200ca-zA-Z0-9\s.,!?:()«»-]'),
+    'en': re.compile(r'[^a-zA-Z0-9\s.,!?;:()\'"%$&/-]'),
+    None: re.compile(r'[^\u0600-\u06FF\u0750-\u077Fa-zA-Z0-9\s.,!?،؛؟]'),
+}
+
+_parser = None
+
+
+def parse_page(url, raw, encoding, race=False, race_budget=5.0, order=None):
+    """Process-pool entry point: decode raw page bytes and run extraction and cleaning
+
+    Takes and returns only plain picklable values; each worker process keeps
+    one ResearcherAgent for the extractors and never touches the network.
+    Returns (result, stats, error) so the extractor attempts reach the parent
+    even when extraction failed.
+    """
+    global _parser
+    if _parser is None:
+        _parser = ResearcherAgent()
+    _parser.race = race
+    _parser.race_budget = race_budget
+    stats = {}
+    try:
+        return _parser.extract_from_html(url, raw.decode(encoding, errors='replace'), stats, order), stats, None
+    except Exception as e:
+        return None, stats, e
+
 
 class ResearcherAgent:
-    def __init__(self):
+    def __init__(self, timeout=10, robots_ttl=3600, robots_cache_size=512, cache=None,
+                 race=False, race_budget=5.0, metrics=None, max_bytes=5 * 1024 * 1024,
+                 content_types=HTML_CONTENT_TYPES, parse_processes=0, extractor_stats=None,
+                 resilience=None, min_quality=0.5):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -19,48 +73,139 @@ class ResearcherAgent:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        self.timeout = timeout
+        # Bodies are streamed and abandoned past max_bytes (None disables the cap);
+        # responses whose Content-Type is not listed are rejected before the body is read.
+        self.max_bytes = max_bytes
+        self.content_types = content_types
+        self.robots = RobotsCache(self.session, ttl=robots_ttl, max_hosts=robots_cache_size, timeout=timeout)
+        # Optional HttpCache; when set, pages are revalidated instead of re-downloaded.
+        self.cache = cache
+        # In race mode all extractors run in parallel and the best-scoring text
+        # that is ready within race_budget seconds wins.
+        self.race = race
+        self.race_budget = race_budget
+        self._race_pool = GrowingThreadPool("race")
+        # Stage timings go to a metrics.Metrics hook; the default discards them.
+        self.metrics = metrics or NULL_METRICS
+        # With parse_processes > 0, pages are downloaded as raw bytes and parsed in a
+        # process pool of that size, so CPU-bound extraction is not limited by the GIL.
+        self.parse_processes = parse_processes
+        self._parse_pool = None
+        self._pool_lock = threading.Lock()
+        # Optional extractor_stats.ExtractorStats; the fallback chain is then
+        # ordered per domain by each extractor's past success rate and latency.
+        self.extractor_stats = extractor_stats
+        # An extractor attempt only counts as a success in those statistics when its output
+        # scores at least min_quality; merely non-empty output (BeautifulSoup's whole <body>)
+        # would otherwise rank the crudest, fastest extractor first.
+        self.min_quality = min_quality
+        # Retries, per-host circuit breaking and optional hedging around every page fetch.
+        self.resilience = resilience or Resilience(metrics=self.metrics)
 
     def is_allowed(self, url):
         try:
-            parsed_url = urlparse(url)
-            robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
-            rp = RobotFileParser()
-            rp.set_url(robots_url)
-            rp.read()
-            return rp.can_fetch("*", url)
+            return self.robots.can_fetch(url)
         except Exception:
             return True
 
-    def clean_text(self, text):
+    def clean_text(self, text, language=None):
         if not text:
             return ""
         text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\u0600-\u06FF\u0750-\u077Fa-zA-Z0-9\s.,!?،؛؟]', '', text)
+        text = CLEAN_PATTERNS.get(language, CLEAN_PATTERNS[None]).sub('', text)
         return text.strip()
 
-    def extract_with_newspaper(self, url):
+    def fetch_page(self, url, headers=None, decode=True):
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            page = {
+                'status': response.status_code,
+                'html': None,
+                'bytes': 0,
+                # Redirects followed by requests are extra round trips too.
+                'round_trips': len(response.history) + 1,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'encoding': None,
+            }
+            if response.status_code != 304:
+                self.check_response_headers(response)
+                page['html'], page['bytes'], page['encoding'] = self.read_body(response, decode)
+        return page
+
+    def check_response_headers(self, response):
+        """Reject non-HTML or oversized responses before any of the body is downloaded"""
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and self.content_types and content_type not in self.content_types:
+            raise ValueError(f"نوع محتوای این صفحه ({content_type}) قابل استخراج نیست.")
+        length = response.headers.get('Content-Length')
+        if self.max_bytes and length and length.isdigit() and int(length) > self.max_bytes:
+            raise ValueError("حجم این صفحه بیش از حد مجاز است.")
+
+    def read_body(self, response, decode=True):
+        """Stream the body chunk by chunk, aborting once max_bytes is exceeded
+
+        Returns (body, size, encoding); the body is decoded text, or the raw
+        bytes if ``decode`` is false.
+        """
+        encoding = None
+        decoder = None
+        parts = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if self.max_bytes and size > self.max_bytes:
+                raise ValueError("حجم این صفحه بیش از حد مجاز است.")
+            if encoding is None:
+                encoding = self.detect_encoding(response, chunk)
+                if decode:
+                    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            parts.append(decoder.decode(chunk) if decode else chunk)
+        if not decode:
+            return b''.join(parts), size, encoding or 'utf-8'
+        if decoder is not None:
+            parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts), size, encoding
+
+    def detect_encoding(self, response, first_chunk):
+        if 'charset' in response.headers.get('Content-Type', '').lower() and response.encoding:
+            encoding = response.encoding
+        else:
+            match = META_CHARSET_PATTERN.search(first_chunk[:4096])
+            if match:
+                encoding = match.group(1).decode('ascii')
+            else:
+                # Same detector requests uses for apparent_encoding, on the first chunk only.
+                encoding = requests.compat.chardet.detect(first_chunk)['encoding'] or 'utf-8'
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = 'utf-8'
+        return encoding
+
+    def extract_with_newspaper(self, url, html):
         try:
+            # Extractor libraries are imported on first use to keep startup fast.
+            from newspaper import Article
             article = Article(url)
-            article.download()
+            article.set_html(html)
             article.parse()
             return article.text
         except Exception:
             return None
 
-    def extract_with_trafilatura(self, url):
+    def extract_with_trafilatura(self, url, html):
         try:
-            downloaded = trafilatura.fetch_url(url)
-            if downloaded:
-                return trafilatura.extract(downloaded)
-            return None
+            import trafilatura
+            return trafilatura.extract(html, url=url)
         except Exception:
             return None
 
-    def extract_with_bs4(self, url):
+    def extract_with_bs4(self, url, html):
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(html, 'html.parser')
             
             for element in soup.find_all(['script', 'style', 'nav', 'header', 'footer', 'aside']):
                 element.decompose()
@@ -78,38 +223,366 @@ class ResearcherAgent:
         except Exception:
             return None
 
-    def extract_content(self, url):
+    def translate_error(self, error):
+        """Map a low-level extraction error to the user-facing exception raised by the agent"""
+        if isinstance(error, CircuitOpenError):
+            return ConnectionError("این وب‌سایت موقتاً پاسخ نمی‌دهد. لطفاً کمی بعد دوباره تلاش کنید.")
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return ConnectionError("خطا در اتصال به سرور. لطفاً اتصال اینترنت خود را بررسی کنید.")
+        if isinstance(error, requests.exceptions.Timeout):
+            return TimeoutError("زمان اتصال به سرور به پایان رسید. لطفاً دوباره تلاش کنید.")
+        if isinstance(error, requests.exceptions.HTTPError):
+            if error.response.status_code == 403:
+                return PermissionError("دسترسی به این وب‌سایت مسدود شده است.")
+            elif error.response.status_code == 404:
+                return FileNotFoundError("صفحه مورد نظر یافت نشد.")
+        return Exception(f"خطا در استخراج محتوا: {str(error)}")
+
+    def download(self, url, bypass_cache=False):
+        """Validate the URL, check robots.txt and fetch the page once (conditionally if cached)"""
         if not url.startswith(('http://', 'https://')):
             raise ValueError("URL نامعتبر است. لطفاً یک URL معتبر وارد کنید.")
 
-        if not self.is_allowed(url):
+        with self.metrics.span('robots'):
+            allowed = self.is_allowed(url)
+        if not allowed:
             raise PermissionError("این وب‌سایت اجازه scraping نمی‌دهد.")
 
+        cached = None
+        headers = None
+        if self.cache is not None and not bypass_cache:
+            with self.metrics.span('cache_lookup') as span:
+                cached = self.cache.get(url)
+                span.set(hit=bool(cached))
+            if cached:
+                headers = self.cache.validators(cached)
+
+        started = time.perf_counter()
         try:
-            content = self.extract_with_newspaper(url)
-            if content:
-                return {'content': self.clean_text(content), 'source': 'newspaper3k'}
+            with self.metrics.span('fetch') as span:
+                page = self.resilience.call(url, self.fetch_page, url, headers, decode=not self.parse_processes)
+                span.set(bytes=page['bytes'], round_trips=page['round_trips'], status=str(page['status']))
+        except Exception as e:
+            raise self.translate_error(e)
+        page['fetch_seconds'] = time.perf_counter() - started
+        page['cached'] = cached
+        return page
 
-            content = self.extract_with_trafilatura(url)
-            if content:
-                return {'content': self.clean_text(content), 'source': 'trafilatura'}
+    def extract_page(self, url, page, links=False):
+        """Turn a downloaded page into a result, reusing the cached extraction on a 304
 
-            content = self.extract_with_bs4(url)
-            if content:
-                return {'content': self.clean_text(content), 'source': 'beautifulsoup4'}
+        With ``links`` the result also lists the normalized links found on the page.
+        """
+        stats = {'round_trips': page['round_trips'], 'fetch_seconds': page['fetch_seconds']}
+        cached = page.get('cached')
+        html = page['html']
+        encoding = page.get('encoding') or 'utf-8'
+        if page['status'] == 304 and cached:
+            self.cache.touch(url)
+            stats['cache'] = 'revalidated'
+            self.metrics.count('cache_revalidated')
+            html, encoding = cached['html'], 'utf-8'
+            if cached['result']:
+                result = {'content': cached['result']['content'], 'source': cached['result']['source'], 'stats': stats}
+                if links:
+                    result['links'] = self.page_links(url, html)
+                return result
 
-            raise ValueError("نتوانستیم محتوای قابل استخراجی از این صفحه پیدا کنیم.")
+        if self.parse_processes:
+            raw = html.encode(encoding) if isinstance(html, str) else html
+            result = self.parse_in_process(url, raw, encoding, stats)
+            if self.cache is not None and isinstance(html, bytes):
+                html = html.decode(encoding, errors='replace')
+        else:
+            result = self.extract_from_html(url, html, stats)
+        if self.cache is not None:
+            self.cache.put(url, html, page['etag'], page['last_modified'],
+                           {'content': result['content'], 'source': result['source']})
+        if links:
+            result['links'] = self.page_links(url, html.decode(encoding, errors='replace')
+                                              if isinstance(html, bytes) else html)
+        return result
+
+    def page_links(self, url, html):
+        """Absolute, normalized http(s) links of a page, in document order"""
+        links = {}
+        for href in HREF_PATTERN.findall(html):
+            link = urljoin(url, html_lib.unescape(href))
+            if link.startswith(('http://', 'https://')):
+                links.setdefault(normalize_url(link), None)
+        return list(links)
+
+    def parse_in_process(self, url, raw, encoding, stats):
+        """Run parse_page in the process pool and merge its stats into ``stats``"""
+        with self._pool_lock:
+            # extract_many worker threads get here together; only one may create the pool.
+            if self._parse_pool is None:
+                self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+            pool = self._parse_pool
+        with self.metrics.span('parse_process') as span:
+            order = [source for source, _ in self.extractors(url)]
+            result, parse_stats, error = pool.submit(parse_page, url, raw, encoding, self.race, self.race_budget,
+                                                     order).result()
+            span.set(bytes=len(raw))
+        stats.update(parse_stats)
+        self.record_attempts(url, stats)
+        if error is not None:
+            raise error
+        result['stats'] = stats
+        self.metrics.count('extractor_used', source=result['source'], mode='process')
+        return result
+
+    def close(self):
+        with self._pool_lock:
+            parse_pool, self._parse_pool = self._parse_pool, None
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        self._race_pool.shutdown()
+        self.resilience.close()
+
+    def warm_up(self):
+        """Import the extractor libraries ahead of the first page"""
+        import newspaper
+        import trafilatura
+        import bs4
+
+    def extractors(self, url=None, order=None):
+        """(name, function) pairs in the order they should be tried for ``url``"""
+        extractors = [
+            ('newspaper3k', self.extract_with_newspaper),
+            ('trafilatura', self.extract_with_trafilatura),
+            ('beautifulsoup4', self.extract_with_bs4),
+        ]
+        if order is None and url is not None and self.extractor_stats is not None:
+            order = self.extractor_stats.order(domain_of(url), [source for source, _ in extractors])
+        if order:
+            extractors.sort(key=lambda item: order.index(item[0]) if item[0] in order else len(order))
+        return extractors
+
+    def record_attempts(self, url, stats):
+        if self.extractor_stats is None:
+            return
+        domain = domain_of(url)
+        for source, success, seconds in stats.get('attempts', ()):
+            self.extractor_stats.record(domain, source, success, seconds)
+
+    def score_content(self, text, anchors=()):
+        """Heuristic quality score in [0, 1] for an extractor's raw output
+
+        Combines length, link density (share of the text that is anchor
+        text on the page), boilerplate ratio (short or cookie/subscribe-like
+        lines) and script consistency (Persian vs Latin letters).
+        """
+        text = text.strip() if text else ""
+        if not text:
+            return 0.0
+        length_score = min(1.0, len(text) / 2000)
+
+        link_chars = sum(len(anchor) for anchor in anchors if anchor in text)
+        link_density = min(1.0, link_chars / len(text))
+
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        boilerplate = sum(1 for line in lines if len(line) < 30 or BOILERPLATE_PATTERN.search(line))
+        boilerplate_ratio = boilerplate / len(lines)
+
+        persian = len(re.findall(r'[\u0600-\u06FF]', text))
+        latin = len(re.findall(r'[a-zA-Z]', text))
+        consistency = max(persian, latin) / (persian + latin) if persian + latin else 0.0
+
+        return length_score * (1 - link_density) * (1 - 0.5 * boilerplate_ratio) * consistency
+
+    def page_anchors(self, html):
+        anchors = set()
+        for match in ANCHOR_PATTERN.findall(html):
+            anchor = ' '.join(TAG_PATTERN.sub(' ', match).split())
+            if len(anchor) > 3:
+                anchors.add(anchor)
+        return anchors
+
+    def race_pool(self, concurrency=2):
+        """The shared race pool, grown so ``concurrency`` pages can run all their extractors at once"""
+        return self._race_pool.get(concurrency * len(self.extractors()))
+
+    def extract_race(self, url, html, stats):
+        """Run every extractor concurrently and keep the best-scoring output within the budget
 
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError("خطا در اتصال به سرور. لطفاً اتصال اینترنت خود را بررسی کنید.")
-        except requests.exceptions.Timeout:
-            raise TimeoutError("زمان اتصال به سرور به پایان رسید. لطفاً دوباره تلاش کنید.")
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 403:
-                raise PermissionError("دسترسی به این وب‌سایت مسدود شده است.")
-            elif e.response.status_code == 404:
-                raise FileNotFoundError("صفحه مورد نظر یافت نشد.")
+        Each extractor's budget starts when it starts running, not while it
+        waits for a pool thread. If none has produced text when the budget
+        runs out, the first non-empty result of the ones still running wins.
+        """
+        executor = self.race_pool()
+        started = {}
+
+        def timed(source, extractor):
+            started[source] = time.perf_counter()
+            with self.metrics.span(source) as span:
+                content = extractor(url, html)
+                span.set(chars=len(content or ''))
+            return content, time.perf_counter() - started[source]
+
+        # Copy the context so the spans land in the caller's metrics trace.
+        futures = {
+            executor.submit(contextvars.copy_context().run, timed, source, extractor): source
+            for source, extractor in self.extractors()
+        }
+        not_done = set(futures)
+        while not_done:
+            begun = [started.get(futures[future]) for future in not_done]
+            if None in begun:
+                # Still queued for a thread; its budget has not started yet.
+                timeout = 0.05
             else:
-                raise Exception(f"خطا در استخراج محتوا: {str(e)}")
+                timeout = max(begun) + self.race_budget - time.perf_counter()
+                if timeout <= 0:
+                    break
+            _, not_done = wait(not_done, timeout=timeout)
+        if not any(future.result()[0] for future in futures if future not in not_done):
+            while not_done:
+                done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+                if any(future.result()[0] for future in done):
+                    break
+        for future in not_done:
+            # Threads cannot be interrupted; late extractors simply finish unobserved.
+            future.cancel()
+
+        anchors = self.page_anchors(html)
+        stats['extractor_seconds'] = {source: None for source in futures.values()}
+        stats['scores'] = {}
+        # Extractors that missed the budget count as slow failures.
+        stats['attempts'] = [[futures[future], False, self.race_budget] for future in not_done]
+        best = None
+        # Walk the extractors in their fixed order so equal scores go to the earlier one.
+        for future, source in futures.items():
+            if future in not_done:
+                continue
+            content, seconds = future.result()
+            stats['extractor_seconds'][source] = seconds
+            score = self.score_content(content, anchors)
+            stats['attempts'].append([source, score >= self.min_quality, seconds])
+            stats['scores'][source] = score
+            if content and (best is None or score > best[0]):
+                best = (score, source, content)
+        if best is None:
+            return None, None
+        stats['winner_score'] = stats['quality'] = best[0]
+        return best[1], best[2]
+
+    def clean_stage(self, content, stats):
+        """Detect the language on a prefix of the extracted text, then clean it with that language's character set"""
+        with self.metrics.span('detect_language') as span:
+            language = detect_language(content)
+            span.set(language=language)
+        stats['language'] = language
+        with self.metrics.span('clean_text') as span:
+            content = self.clean_text(content, language)
+            span.set(chars=len(content))
+        return content
+
+    def extract_from_html(self, url, html, stats=None, order=None):
+        """Run the newspaper3k -> trafilatura -> BeautifulSoup fallback chain on fetched HTML
+
+        The chain is reordered per domain when ``extractor_stats`` is set, or
+        by an explicit ``order`` of extractor names.
+        """
+        stats = stats if stats is not None else {}
+        stats['attempts'] = []
+        started = time.perf_counter()
+        try:
+            if self.race:
+                source, content = self.extract_race(url, html, stats)
+                if content:
+                    content = self.clean_stage(content, stats)
+                    stats['extract_seconds'] = time.perf_counter() - started
+                    self.metrics.count('extractor_used', source=source, mode='race')
+                    return {'content': content, 'source': source, 'stats': stats}
+                raise ValueError("نتوانستیم محتوای قابل استخراجی از این صفحه پیدا کنیم.")
+
+            anchors = None
+            for position, (source, extractor) in enumerate(self.extractors(url, order)):
+                attempt_started = time.perf_counter()
+                with self.metrics.span(source) as span:
+                    content = extractor(url, html)
+                    span.set(chars=len(content or ''))
+                seconds = time.perf_counter() - attempt_started
+                quality = 0.0
+                if content:
+                    anchors = self.page_anchors(html) if anchors is None else anchors
+                    quality = stats['quality'] = self.score_content(content, anchors)
+                stats['attempts'].append([source, quality >= self.min_quality, seconds])
+                if content:
+                    content = self.clean_stage(content, stats)
+                    stats['extract_seconds'] = time.perf_counter() - started
+                    self.metrics.count('extractor_used', source=source, mode='fallback' if position else 'first')
+                    return {'content': content, 'source': source, 'stats': stats}
+
+            raise ValueError("نتوانستیم محتوای قابل استخراجی از این صفحه پیدا کنیم.")
         except Exception as e:
-            raise Exception(f"خطا در استخراج محتوا: {str(e)}")
\ No newline at end of file
+            raise self.translate_error(e)
+        finally:
+            self.record_attempts(url, stats)
+
+    def extract_content(self, url, bypass_cache=False):
+        page = self.download(url, bypass_cache)
+        return self.extract_page(url, page)
+
+    async def extract_many(self, urls, concurrency=10, per_host=2, delay=0.0, bypass_cache=False, links=False):
+        """Extract many URLs concurrently, yielding (url, result, error) as each one finishes
+
+        ``concurrency`` caps in-flight URLs overall, ``per_host`` caps parallel
+        downloads from one host and ``delay`` is the minimum number of seconds
+        between two downloads from the same host. ``urls`` may be any iterable
+        and is consumed lazily, so huge or streamed URL lists stay cheap.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        if self.race and not self.parse_processes:
+            self.race_pool(concurrency)
+        if self.resilience.hedge_after:
+            self.resilience.hedge_pool(concurrency)
+        global_limit = asyncio.Semaphore(concurrency)
+        hosts = {}
+
+        def host_state(host):
+            state = hosts.get(host)
+            if state is None:
+                state = hosts[host] = {'limit': asyncio.Semaphore(per_host), 'next': 0.0}
+            return state
+
+        async def process(url):
+            async with global_limit:
+                try:
+                    host = host_state(urlparse(url).netloc)
+                    async with host['limit']:
+                        if delay:
+                            # Reserve the next download slot for this host before sleeping.
+                            pause = host['next'] - loop.time()
+                            host['next'] = max(host['next'], loop.time()) + delay
+                            if pause > 0:
+                                await asyncio.sleep(pause)
+                        page = await loop.run_in_executor(executor, self.download, url, bypass_cache)
+                    result = await loop.run_in_executor(executor, self.extract_page, url, page, links)
+                    return url, result, None
+                except Exception as e:
+                    return url, None, e
+
+        pending = set()
+        url_iter = iter(urls)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency * 2:
+                    try:
+                        url = next(url_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(process(url)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            executor.shutdown(wait=False)
@@ -0,0 +1,199 @@
+"""Retry, per-host circuit breaking and request hedging for page fetches
+
+``Resilience.call(url, fn, ...)`` runs one fetch attempt through ``fn`` and:
+
+- retries transient failures (connection errors, timeouts, 429 and 5xx
+  responses) with exponential backoff and full jitter, waiting at least as
+  long as a ``Retry-After`` header asks for;
+- keeps a circuit breaker per host that opens after ``failure_threshold``
+  consecutive transient failures, fails fast while open and lets a single
+  probe through after ``reset_timeout`` seconds;
+- optionally hedges: if an attempt has not finished after ``hedge_after``
+  seconds a second identical request is started and the first to succeed
+  wins.
+
+Retries, fail-fast rejections, breaker transitions and hedges are counted
+on the metrics hook.
+"""
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+from metrics import NULL_METRICS
+from thread_pools import GrowingThreadPool
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host, retry_in):
+        super().__init__(f"circuit open for {host}, retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def retry_after_seconds(response):
+    """Seconds requested by a Retry-After header (delta or HTTP date), or None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Breaker:
+    def __init__(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+
+class Resilience:
+    def __init__(self, retries=2, backoff=0.5, max_backoff=30.0, max_retry_after=60.0, failure_threshold=5,
+                 reset_timeout=30.0, hedge_after=None, metrics=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # A Retry-After longer than this is not waited for; the error is raised instead.
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_after = hedge_after
+        self.metrics = metrics or NULL_METRICS
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._hedge_pool = GrowingThreadPool("hedge")
+
+    def is_transient(self, error):
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response is not None and error.response.status_code in RETRY_STATUSES
+        return isinstance(error, TRANSIENT_ERRORS)
+
+    def _transition(self, host, breaker, state):
+        breaker.state = state
+        self.metrics.count('circuit_transition', host=host, state=state)
+
+    def before(self, host):
+        """Raise CircuitOpenError unless a request to ``host`` may go out now"""
+        with self._lock:
+            breaker = self._breakers.setdefault(host, _Breaker())
+            if breaker.state == 'closed':
+                return
+            waited = time.monotonic() - breaker.opened_at
+            if breaker.state == 'open' and waited >= self.reset_timeout:
+                self._transition(host, breaker, 'half_open')
+            if breaker.state == 'half_open' and not breaker.probing:
+                breaker.probing = True
+                return
+        self.metrics.count('circuit_rejected')
+        raise CircuitOpenError(host, max(0.0, self.reset_timeout - waited))
+
+    def record(self, host, success):
+        """Update the breaker of ``host``; ``success=None`` only ends a probe and leaves the breaker as it is"""
+        with self._lock:
+            breaker = self._breakers.setdefault(host, _Breaker())
+            breaker.probing = False
+            if success is None:
+                return
+            if success:
+                breaker.failures = 0
+                if breaker.state != 'closed':
+                    self._transition(host, breaker, 'closed')
+                return
+            breaker.failures += 1
+            if breaker.state == 'half_open' or (breaker.state == 'closed'
+                                                and breaker.failures >= self.failure_threshold):
+                breaker.opened_at = time.monotonic()
+                self._transition(host, breaker, 'open')
+
+    def delay(self, attempt, error):
+        """Full-jitter exponential backoff, but never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if isinstance(error, requests.exceptions.HTTPError):
+            retry_after = retry_after_seconds(error.response)
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+                delay = max(delay, retry_after)
+        return delay
+
+    def call(self, url, fn, *args, **kwargs):
+        host = urlparse(url).netloc
+        for attempt in range(self.retries + 1):
+            self.before(host)
+            try:
+                result = self._attempt(fn, args, kwargs)
+            except Exception as e:
+                transient = self.is_transient(e)
+                # Only server-side trouble counts against the host; a 404 says nothing about its
+                # health either way, so it neither resets the failure count nor closes the breaker.
+                self.record(host, success=False if transient else None)
+                if not transient or attempt == self.retries:
+                    raise
+                delay = self.delay(attempt, e)
+                if delay is None:
+                    raise
+                reason = str(e.response.status_code) if isinstance(e, requests.exceptions.HTTPError) \
+                    else type(e).__name__
+                self.metrics.count('fetch_retry', reason=reason)
+                time.sleep(delay)
+                continue
+            self.record(host, success=True)
+            return result
+
+    def hedge_pool(self, concurrency=8):
+        """The hedging pool, grown so ``concurrency`` callers can each run an attempt and a hedge"""
+        return self._hedge_pool.get(2 * concurrency)
+
+    def _attempt(self, fn, args, kwargs):
+        if not self.hedge_after:
+            return fn(*args, **kwargs)
+        executor = self.hedge_pool()
+        running = threading.Event()
+
+        def first_attempt():
+            running.set()
+            return fn(*args, **kwargs)
+
+        first = executor.submit(contextvars.copy_context().run, first_attempt)
+        # hedge_after counts from when the request goes out, not from when it was queued for a thread.
+        running.wait()
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        self.metrics.count('fetch_hedged')
+        futures = [first, executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)]
+        error = None
+        while futures:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        self.metrics.count('hedge_won')
+                    # The slower request finishes in the background and is discarded.
+                    return future.result()
+                error = future.exception()
+            futures = list(pending)
+        raise error
+
+    def close(self):
+        self._hedge_pool.shutdown()
+
+    def stats(self):
+        with self._lock:
+            return {host: {'state': breaker.state, 'failures': breaker.failures}
+                    for host, breaker in self._breakers.items() if breaker.state != 'closed' or breaker.failures}
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+
+class RobotsCache:
+    """Per-host cache of parsed robots.txt files with TTL and LRU eviction"""
+
+    def __init__(self, session, ttl=3600, max_hosts=512, timeout=10, user_agent="*"):
+        self.session = session
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.hits = 0
+        self.misses = 0
+        self._parsers = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def can_fetch(self, url):
+        parsed_url = urlparse(url)
+        host = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        return self.get_parser(host).can_fetch(self.user_agent, url)
+
+    def get_parser(self, host):
+        """Return the robots parser for a host, fetching it at most once per TTL"""
+        while True:
+            with self._lock:
+                entry = self._parsers.get(host)
+                if entry and time.monotonic() - entry[1] < self.ttl:
+                    self._parsers.move_to_end(host)
+                    self.hits += 1
+                    return entry[0]
+
+                event = self._in_flight.get(host)
+                if event is None:
+                    self.misses += 1
+                    event = threading.Event()
+                    self._in_flight[host] = event
+                    break
+
+            # Another caller is already fetching this host; wait and re-check.
+            event.wait(self.timeout + 1)
+
+        try:
+            parser = self._fetch(host)
+            with self._lock:
+                self._parsers[host] = (parser, time.monotonic())
+                self._parsers.move_to_end(host)
+                while len(self._parsers) > self.max_hosts:
+                    self._parsers.popitem(last=False)
+            return parser
+        finally:
+            with self._lock:
+                del self._in_flight[host]
+            event.set()
+
+    def _fetch(self, host):
+        parser = RobotFileParser()
+        parser.set_url(f"{host}/robots.txt")
+        try:
+            response = self.session.get(f"{host}/robots.txt", timeout=self.timeout)
+        except Exception:
+            # Same policy as before: an unreachable robots.txt does not block scraping.
+            parser.allow_all = True
+            return parser
+
+        # Mirror urllib.robotparser: auth errors mean "keep out", any other error means "no rules".
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        parser.modified()
+        return parser
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'hosts': len(self._parsers)}
+
+    def clear(self):
+        with self._lock:
+            self._parsers.clear()
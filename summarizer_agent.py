@@ -1,24 +1,37 @@
-from langchain.llms import Ollama
-from langchain.callbacks.manager import CallbackManager
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-import markdown
 import re
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from summary_cache import summary_key
+from metrics import NULL_METRICS
+from language import detect_language
 
 class SummarizerAgent:
-    def __init__(self):
-        callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
-        self.llm = Ollama(
-            model="llama3.2",
-            temperature=0.7,
-            callback_manager=callback_manager,
-            verbose=True,
-        )
+    def __init__(self, model="llama3.2", temperature=0.7, cache=None, chunk_tokens=1500, chunk_workers=4,
+                 base_url="http://localhost:11434", verbose=True, metrics=None, dedup=None, model_path=None,
+                 llm_client=None):
+        self.model = model
+        # With a GGUF ``model_path`` the model runs in-process through llama.cpp instead of Ollama.
+        self.model_path = model_path
+        # Optional llm_scheduler.OllamaClient (pooled connections, in-flight cap, retries).
+        self.llm_client = llm_client
+        self.temperature = temperature
+        # Documents estimated above this many tokens are summarized chunk by chunk
+        # so they fit Ollama's default 2048-token context instead of being truncated.
+        self.chunk_tokens = chunk_tokens
+        self.chunk_workers = chunk_workers
+        self.metrics = metrics or NULL_METRICS
+        # Optional SummaryCache; identical content is then only sent to the LLM once.
+        self.cache = cache
+        # Optional dedup.NearDuplicateIndex; near-identical content reuses an earlier summary.
+        self.dedup = dedup
+        self.base_url = base_url
+        self.verbose = verbose
+        # langchain and the Ollama client are only imported and built on first use.
+        self._llm = None
+        self._load_lock = threading.Lock()
         
-        self.summary_prompt = PromptTemplate(
-            input_variables=["content"],
-            template="""
+        self.summary_template = """
             Please analyze the following text and create a structured summary. If the text is in Persian, provide the summary in Persian. If the text is in English, provide the summary in English.
 
             Follow this exact structure:
@@ -38,9 +51,228 @@ class SummarizerAgent:
 
             Note: Ensure the summary maintains the original language of the text and follows the exact structure above.
             """
-        )
-        
-        self.chain = LLMChain(llm=self.llm, prompt=self.summary_prompt)
+
+        self.chunk_template = """
+            The following text is one part of a longer document. List its most important facts as short bullet points, in the same language as the text (Persian or English).
+
+            Text:
+            {content}
+            """
+
+        self.merge_template = """
+            The following bullet points are partial summaries of consecutive parts of one document. Combine them into a single structured summary, in the same language as the notes (Persian or English).
+
+            Follow this exact structure:
+
+            # [Main Title]
+            [A comprehensive one-paragraph summary of the entire text]
+
+            ## Key Points
+            - [First key point]
+            - [Second key point]
+            - [Third key point]
+            - [Fourth key point]
+            - [Fifth key point]
+
+            Partial summaries:
+            {content}
+            """
+
+        self.update_template = """
+            Below is the current structured summary of a web page, followed by the passages that were added to and removed from the page since it was summarized. Update the summary so it reflects the page as it is now: add what is new, drop what was removed, and leave everything else unchanged. Keep the language of the summary (Persian or English).
+
+            Keep this exact structure:
+
+            # [Main Title]
+            [A comprehensive one-paragraph summary of the entire text]
+
+            ## Key Points
+            - [First key point]
+            - [Second key point]
+            - [Third key point]
+            - [Fourth key point]
+            - [Fifth key point]
+
+            {content}
+            """
+
+        # Shorter prompts for the languages language.detect_language recognizes, so the
+        # LLM is not told how to handle both on every call; the templates above are the
+        # fallback for other or undetected languages.
+        self.language_templates = {
+            'fa': {
+                'summary': """
+            Summarize this Persian text in Persian, using exactly this structure:
+
+            # [Title]
+            [One-paragraph summary]
+
+            ## Key Points
+            - [Five key points, one per line]
+
+            Text:
+            {content}
+            """,
+                'chunk': """
+            This is one part of a longer Persian document. List its key facts as short bullet points in Persian.
+
+            Text:
+            {content}
+            """,
+                'merge': """
+            Combine these partial summaries of one Persian document into one summary in Persian, using exactly this structure:
+
+            # [Title]
+            [One-paragraph summary]
+
+            ## Key Points
+            - [Five key points, one per line]
+
+            Partial summaries:
+            {content}
+            """,
+                'update': """
+            Update this Persian summary of a web page with the passages added to and removed from the page: add what is new, drop what was removed, keep the rest and keep this structure:
+
+            # [Title]
+            [One-paragraph summary]
+
+            ## Key Points
+            - [Five key points, one per line]
+
+            {content}
+            """,
+            },
+            'en': {
+                'summary': """
+            Summarize this English text in English, using exactly this structure:
+
+            # [Title]
+            [One-paragraph summary]
+
+            ## Key Points
+            - [Five key points, one per line]
+
+            Text:
+            {content}
+            """,
+                'chunk': """
+            This is one part of a longer English document. List its key facts as short bullet points in English.
+
+            Text:
+            {content}
+            """,
+                'merge': """
+            Combine these partial summaries of one English document into one summary in English, using exactly this structure:
+
+            # [Title]
+            [One-paragraph summary]
+
+            ## Key Points
+            - [Five key points, one per line]
+
+            Partial summaries:
+            {content}
+            """,
+                'update': """
+            Update this English summary of a web page with the passages added to and removed from the page: add what is new, drop what was removed, keep the rest and keep this structure:
+
+            # [Title]
+            [One-paragraph summary]
+
+            ## Key Points
+            - [Five key points, one per line]
+
+            {content}
+            """,
+            },
+        }
+        self._chains = {}
+
+    def load_llm(self):
+        """Import langchain and build the LLM client (once); chains are built per template by ``chain_for``"""
+        if self._llm is not None:
+            return
+        with self._load_lock:
+            if self._llm is not None:
+                return
+            from langchain.llms import Ollama
+            from langchain.callbacks.manager import CallbackManager
+            from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+
+            callback_manager = CallbackManager([StreamingStdOutCallbackHandler()] if self.verbose else [])
+            if self.model_path:
+                from llama_backend import LlamaCppLLM, get_backend
+                backend = get_backend(self.model_path, temperature=self.temperature)
+                for language in (None, *self.language_templates):
+                    for template in self.templates(language).values():
+                        backend.register_prefix(template)
+                llm = LlamaCppLLM(backend=backend, callback_manager=callback_manager, verbose=self.verbose)
+            elif self.llm_client is not None:
+                from llm_scheduler import OllamaClientLLM
+                llm = OllamaClientLLM(client=self.llm_client, callback_manager=callback_manager, verbose=self.verbose)
+            else:
+                llm = Ollama(
+                    model=self.model,
+                    base_url=self.base_url,
+                    temperature=self.temperature,
+                    callback_manager=callback_manager,
+                    verbose=self.verbose,
+                )
+            self._llm = llm
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self.load_llm()
+        return self._llm
+
+    def templates(self, language=None):
+        """{kind: template} for a language, falling back to the generic template per kind"""
+        generic = {'summary': self.summary_template, 'chunk': self.chunk_template,
+                   'merge': self.merge_template, 'update': self.update_template}
+        return {**generic, **self.language_templates.get(language, {})}
+
+    def chain_for(self, kind, language=None):
+        """The LLMChain for one kind of prompt in a language, built once per template"""
+        template = self.templates(language)[kind]
+        chain = self._chains.get(template)
+        if chain is None:
+            from langchain.prompts import PromptTemplate
+            from langchain.chains import LLMChain
+            chain = LLMChain(llm=self.llm, prompt=PromptTemplate(input_variables=["content"], template=template))
+            self._chains[template] = chain
+        return chain
+
+    # The generic chains, as attributes for callers written before per-language prompts.
+    @property
+    def chain(self):
+        return self.chain_for('summary')
+
+    @property
+    def summary_prompt(self):
+        return self.chain_for('summary').prompt
+
+    @property
+    def chunk_chain(self):
+        return self.chain_for('chunk')
+
+    @property
+    def merge_chain(self):
+        return self.chain_for('merge')
+
+    @property
+    def update_chain(self):
+        return self.chain_for('update')
+
+    def detect_language(self, content):
+        with self.metrics.span('detect_language') as span:
+            language = detect_language(content)
+            span.set(language=language)
+        return language
+
+    def warm_up(self):
+        self.load_llm()
 
     def clean_markdown(self, text):
         """Clean and format the markdown output"""
@@ -50,17 +282,171 @@ class SummarizerAgent:
         text = re.sub(r' +', ' ', text)
         return text.strip()
 
-    def summarize(self, content):
-        """Summarize the content using the LLM"""
+    def estimate_tokens(self, text):
+        """Rough token count; Persian script tokenizes worse than English, so stay conservative"""
+        return len(text) // 3 + 1
+
+    def split_chunks(self, content, budget):
+        """Split content on sentence boundaries into pieces of at most ``budget`` estimated tokens"""
+        chunks = []
+        current = []
+        size = 0
+        for sentence in re.split(r'(?<=[.!?؟])\s+|\n{2,}', content):
+            pieces = [sentence]
+            if self.estimate_tokens(sentence) > budget:
+                # A single run-on "sentence" is cut on word boundaries instead.
+                words = sentence.split()
+                step = max(1, len(words) * budget // self.estimate_tokens(sentence))
+                pieces = [' '.join(words[i:i + step]) for i in range(0, len(words), step)]
+            for piece in pieces:
+                tokens = self.estimate_tokens(piece)
+                if current and size + tokens > budget:
+                    chunks.append(' '.join(current))
+                    current, size = [], 0
+                current.append(piece)
+                size += tokens
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    def cache_key(self, content, language=None):
+        params = {'temperature': self.temperature, 'chunk_tokens': self.chunk_tokens}
+        model = f"llama_cpp:{self.model_path}" if self.model_path else self.model
+        # Every prompt this document goes through, so editing any of them invalidates its summary.
+        kinds = ('chunk', 'merge') if self.estimate_tokens(content) > self.chunk_tokens else ('summary',)
+        templates = self.templates(language)
+        return summary_key(content, "\0".join(templates[kind] for kind in kinds), model, params)
+
+    def run_prompt(self, chain, content, on_token=None):
+        """Run a chain, streaming generated tokens to ``on_token`` when given"""
+        if on_token is None:
+            return chain.run(content)
+        parts = []
+        for token in self.llm.stream(chain.prompt.format(content=content)):
+            parts.append(token)
+            on_token(token)
+        return "".join(parts)
+
+    def run_chunk(self, chunk, language=None):
+        with self.metrics.span('llm_chunk') as span:
+            partial = self.chain_for('chunk', language).run(chunk)
+            span.set(tokens_in=self.estimate_tokens(chunk), tokens_out=self.estimate_tokens(partial))
+        return partial
+
+    def summarize_chunked(self, content, stats, depth=0, on_token=None, language=None):
+        """Map-reduce: summarize chunks concurrently, then merge the partial summaries"""
+        chunks = self.split_chunks(content, self.chunk_tokens)
+        stats['chunks'] += len(chunks)
+        stats['tokens_in'] += sum(self.estimate_tokens(chunk) for chunk in chunks)
+        with ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+            # Copy the context so per-chunk spans land in the caller's metrics trace.
+            futures = [executor.submit(contextvars.copy_context().run, self.run_chunk, chunk, language) for chunk in chunks]
+            partials = [future.result() for future in futures]
+        stats['tokens_out'] += sum(self.estimate_tokens(partial) for partial in partials)
+
+        notes = "\n\n".join(partials)
+        if self.estimate_tokens(notes) > self.chunk_tokens and depth < 2:
+            return self.summarize_chunked(notes, stats, depth + 1, on_token, language)
+
+        stats['tokens_in'] += self.estimate_tokens(notes)
+        with self.metrics.span('llm_merge') as span:
+            summary = self.run_prompt(self.chain_for('merge', language), notes, on_token)
+            span.set(tokens_in=self.estimate_tokens(notes), tokens_out=self.estimate_tokens(summary))
+        stats['tokens_out'] += self.estimate_tokens(summary)
+        return summary
+
+    def summarize_with_stats(self, content, force=False, on_token=None, language=None):
+        """Summarize the content and report chunks and (estimated) tokens used
+
+        If ``on_token`` is given it is called with each piece of text as the
+        LLM generates it (only the final merge step for chunked documents).
+        The prompts follow ``language``, which is detected when not given.
+        """
+        stats = {'summary': None, 'cached': False, 'near_duplicate': None, 'language': None, 'chunks': 0,
+                 'tokens_in': 0, 'tokens_out': 0}
         try:
-            summary = self.chain.run(content)
+            language = stats['language'] = language or self.detect_language(content)
+            key = None
+            if self.cache is not None:
+                key = self.cache_key(content, language)
+                if not force:
+                    with self.metrics.span('summary_cache') as span:
+                        cached = self.cache.get(key)
+                        span.set(hit=cached is not None)
+                    if cached is not None:
+                        self.metrics.count('summary_cached')
+                        if on_token is not None:
+                            on_token(cached)
+                        stats['summary'] = cached
+                        stats['cached'] = True
+                        return stats
+
+            if self.dedup is not None and not force:
+                with self.metrics.span('dedup_lookup'):
+                    match = self.dedup.find(content)
+                if match is not None:
+                    summary, distance = match
+                    self.metrics.count('summary_near_duplicate')
+                    if on_token is not None:
+                        on_token(summary)
+                    if key is not None:
+                        self.cache.put(key, summary)
+                    stats['summary'] = summary
+                    stats['near_duplicate'] = distance
+                    return stats
+
+            self.load_llm()
+            if self.estimate_tokens(content) > self.chunk_tokens:
+                summary = self.summarize_chunked(content, stats, on_token=on_token, language=language)
+            else:
+                stats['chunks'] = 1
+                stats['tokens_in'] = self.estimate_tokens(content)
+                with self.metrics.span('llm') as span:
+                    summary = self.run_prompt(self.chain_for('summary', language), content, on_token)
+                    stats['tokens_out'] = self.estimate_tokens(summary)
+                    span.set(tokens_in=stats['tokens_in'], tokens_out=stats['tokens_out'])
             
-            cleaned_summary = self.clean_markdown(summary)
+            with self.metrics.span('clean_markdown'):
+                cleaned_summary = self.clean_markdown(summary)
+
+            if key is not None:
+                self.cache.put(key, cleaned_summary)
+            if self.dedup is not None:
+                self.dedup.add(content, cleaned_summary)
             
-            return cleaned_summary
+            stats['summary'] = cleaned_summary
+            return stats
         except Exception as e:
             raise Exception(f"خطا در خلاصه‌سازی: {str(e)}")
 
+    def llm_calls(self, content):
+        """Number of LLM requests a full summarization of ``content`` takes (ignoring caches)"""
+        if self.estimate_tokens(content) <= self.chunk_tokens:
+            return 1
+        chunks = len(self.split_chunks(content, self.chunk_tokens))
+        return chunks + 1
+
+    def update_summary(self, summary, added, removed, on_token=None, language=None):
+        """Revise an existing summary with the passages added to and removed from its page"""
+        sections = [f"Current summary:\n{summary}"]
+        if added:
+            sections.append("Added passages:\n" + "\n".join(f"- {passage}" for passage in added))
+        if removed:
+            sections.append("Removed passages:\n" + "\n".join(f"- {passage}" for passage in removed))
+        notes = "\n\n".join(sections)
+        try:
+            self.load_llm()
+            with self.metrics.span('llm_update') as span:
+                updated = self.run_prompt(self.chain_for('update', language or self.detect_language(summary)), notes, on_token)
+                span.set(tokens_in=self.estimate_tokens(notes), tokens_out=self.estimate_tokens(updated))
+            return self.clean_markdown(updated)
+        except Exception as e:
+            raise Exception(f"خطا در به‌روزرسانی خلاصه: {str(e)}")
+
+    def summarize(self, content, force=False, on_token=None, language=None):
+        """Summarize the content using the LLM (or the cache, unless force is set)"""
+        return self.summarize_with_stats(content, force, on_token, language)['summary']
+
     def save_summary(self, summary, output_file="summary.md"):
         """Save the summary to a markdown file"""
         try:
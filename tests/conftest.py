@@ -0,0 +1,27 @@
+import os
+from contextlib import ExitStack
+
+import pytest
+
+from bench_servers import SiteServer
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench_corpus")
+
+
+@pytest.fixture
+def site():
+    with SiteServer(CORPUS_DIR) as server:
+        yield server
+
+
+@pytest.fixture
+def slow_site():
+    with SiteServer(CORPUS_DIR, latency=0.1) as server:
+        yield server
+
+
+@pytest.fixture
+def start_site():
+    """Start extra corpus servers (each its own host), stopped after the test"""
+    with ExitStack() as stack:
+        yield lambda latency=0.0: stack.enter_context(SiteServer(CORPUS_DIR, latency=latency))
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+BATCH_EXTRACT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "batch_extract.py")
+
+
+def run_batch(urls, output, *args):
+    return subprocess.run([sys.executable, BATCH_EXTRACT, "-", "-o", str(output), *args],
+                          input="\n".join(urls), text=True, capture_output=True, check=True)
+
+
+def read_records(output):
+    records = []
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def test_resume_skips_done_urls_and_survives_a_cut_off_line(site, tmp_path):
+    output = tmp_path / "results.jsonl"
+    urls = [f"{site.url}/{name}" for name in sorted(site.pages)][:4]
+    run_batch(urls[:2], output)
+    with open(output, "a", encoding="utf-8") as f:
+        # An interrupted run may leave half a record behind.
+        f.write('{"url": "' + urls[2])
+
+    completed = run_batch(urls, output, "--resume")
+
+    records = read_records(output)
+    assert sorted(record['url'] for record in records) == sorted(urls)
+    assert all(record['error'] is None for record in records)
+    assert "2 already done" in completed.stderr
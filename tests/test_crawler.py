@@ -0,0 +1,13 @@
+from crawler import Frontier
+
+
+def test_resume_with_another_bloom_capacity_keeps_seen_urls(tmp_path):
+    path = str(tmp_path / "frontier.sqlite")
+    frontier = Frontier(path, bloom_capacity=1000)
+    assert all(frontier.add(f"https://example.com/{i}") for i in range(200))
+    frontier.close()
+
+    frontier = Frontier(path, bloom_capacity=50000)
+    assert not any(frontier.add(f"https://example.com/{i}") for i in range(200))
+    assert frontier.stats()['urls'] == 200
+    frontier.close()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+from researcher_agent import ResearcherAgent
+
+
+class DownloadRecorder:
+    """Wraps ResearcherAgent.download to record how many downloads overlap, overall and per host"""
+
+    def __init__(self, researcher):
+        self.download = researcher.download
+        self.lock = threading.Lock()
+        self.active = {}
+        self.max_active = 0
+        self.max_per_host = {}
+        self.starts = []
+        researcher.download = self
+
+    def __call__(self, url, bypass_cache=False):
+        host = url.split("/")[2]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.max_active = max(self.max_active, sum(self.active.values()))
+            self.max_per_host[host] = max(self.max_per_host.get(host, 0), self.active[host])
+            self.starts.append(time.monotonic())
+        try:
+            return self.download(url, bypass_cache)
+        finally:
+            with self.lock:
+                self.active[host] -= 1
+
+
+def collect(researcher, urls, **kwargs):
+    async def run():
+        return [item async for item in researcher.extract_many(urls, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_extracts_every_page(site):
+    urls = [f"{site.url}/{name}" for name in site.pages]
+    results = collect(ResearcherAgent(), urls, concurrency=4, per_host=4)
+    assert sorted(url for url, _, _ in results) == sorted(urls)
+    for url, result, error in results:
+        assert error is None, url
+        assert result['content']
+        assert result['source'] in ('newspaper3k', 'trafilatura', 'beautifulsoup4')
+
+
+def test_global_concurrency_limit(slow_site):
+    researcher = ResearcherAgent()
+    recorder = DownloadRecorder(researcher)
+    urls = [f"{slow_site.url}/en_small.html?n={i}" for i in range(12)]
+    collect(researcher, urls, concurrency=3, per_host=10)
+    assert recorder.max_active == 3
+
+
+def test_per_host_limit(slow_site, start_site):
+    other = start_site(latency=0.1)
+    researcher = ResearcherAgent()
+    recorder = DownloadRecorder(researcher)
+    urls = [f"{server.url}/en_small.html?n={i}" for i in range(6) for server in (slow_site, other)]
+    collect(researcher, urls, concurrency=10, per_host=2)
+    assert sorted(recorder.max_per_host.values()) == [2, 2]
+
+
+def test_delay_between_downloads_from_one_host(site):
+    researcher = ResearcherAgent()
+    recorder = DownloadRecorder(researcher)
+    urls = [f"{site.url}/en_small.html?n={i}" for i in range(4)]
+    collect(researcher, urls, concurrency=4, per_host=4, delay=0.2)
+    starts = sorted(recorder.starts)
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert min(gaps) >= 0.18
+
+
+def test_errors_are_yielded_per_url(site):
+    good = f"{site.url}/en_small.html"
+    missing = f"{site.url}/missing.html"
+    invalid = "not a url"
+    results = {url: (result, error) for url, result, error in collect(ResearcherAgent(), [good, missing, invalid])}
+    assert results[good][1] is None
+    for url in (missing, invalid):
+        result, error = results[url]
+        assert result is None
+        assert isinstance(error, Exception)
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import pytest
+
+from bench_servers import FakeOllamaServer
+from llm_scheduler import OllamaClient, SummaryScheduler
+
+
+def test_client_retries_overloaded_requests():
+    with FakeOllamaServer(first_token_latency=0.01, token_latency=0, fail_every=2) as llm:
+        client = OllamaClient(llm.url, retries=2, backoff=0.01)
+        # Requests 1 and 3 succeed; request 2 gets a 503 and is retried.
+        summaries = [client.generate("first text"), client.generate("second text")]
+        client.close()
+    assert all(summary.startswith("#") for summary in summaries)
+    assert client.stats() == {'requests': 3, 'retries': 1, 'failures': 0, 'in_flight': 0}
+
+
+def test_client_gives_up_after_its_retries():
+    with FakeOllamaServer(fail_every=1) as llm:
+        client = OllamaClient(llm.url, retries=1, backoff=0.01)
+        with pytest.raises(Exception):
+            client.generate("text")
+        client.close()
+    assert client.stats() == {'requests': 2, 'retries': 1, 'failures': 1, 'in_flight': 0}
+
+
+def test_scheduler_blocks_submit_while_the_queue_is_full():
+    async def run():
+        release = threading.Event()
+        scheduler = SummaryScheduler(workers=1, max_queued=2)
+        futures = [await scheduler.submit(release.wait)]
+        # Let the single worker take the first job, so the next two fill the queue.
+        await asyncio.sleep(0.05)
+        futures += [await scheduler.submit(release.wait) for _ in range(2)]
+
+        blocked = asyncio.ensure_future(scheduler.submit(release.wait))
+        await asyncio.sleep(0.1)
+        assert not blocked.done()
+        assert scheduler.pending() == 2
+
+        release.set()
+        futures.append(await blocked)
+        results = await asyncio.gather(*futures)
+        await scheduler.close()
+        return results
+
+    assert asyncio.run(run()) == [True, True, True, True]
+
+
+def test_scheduler_survives_a_cancelled_future():
+    async def run():
+        release = threading.Event()
+        scheduler = SummaryScheduler(workers=1, max_queued=2)
+        running = await scheduler.submit(release.wait)
+        queued = await scheduler.submit(release.wait)
+        await asyncio.sleep(0.05)
+        # One job is cancelled while it runs, the other while it waits in the queue.
+        running.cancel()
+        queued.cancel()
+        release.set()
+        result = await asyncio.wait_for(await scheduler.submit(lambda: "done"), timeout=5)
+        await asyncio.wait_for(scheduler.close(), timeout=5)
+        return result
+
+    assert asyncio.run(run()) == "done"
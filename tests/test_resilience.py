@@ -0,0 +1,85 @@
+import time
+
+import pytest
+import requests
+
+from resilience import CircuitOpenError, Resilience
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return requests.exceptions.HTTPError(f"HTTP {status}", response=response)
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns "ok" """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_retries_a_503_then_succeeds():
+    resilience = Resilience(retries=2, backoff=0.01)
+    fetch = Flaky(http_error(503))
+    assert resilience.call("http://example.com/a", fetch) == "ok"
+    assert fetch.calls == 2
+    assert resilience.stats() == {}
+
+
+def test_retry_after_above_the_maximum_is_raised():
+    resilience = Resilience(retries=2, backoff=0.01, max_retry_after=60)
+    fetch = Flaky(http_error(503, retry_after="120"))
+    with pytest.raises(requests.exceptions.HTTPError):
+        resilience.call("http://example.com/a", fetch)
+    assert fetch.calls == 1
+
+
+def test_breaker_opens_then_lets_a_probe_through_after_the_reset_timeout():
+    resilience = Resilience(retries=0, failure_threshold=2, reset_timeout=0.2)
+    url = "http://example.com/a"
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            resilience.call(url, Flaky(http_error(503)))
+    assert resilience.stats()['example.com']['state'] == 'open'
+
+    fetch = Flaky()
+    with pytest.raises(CircuitOpenError):
+        resilience.call(url, fetch)
+    assert fetch.calls == 0
+
+    time.sleep(0.25)
+    assert resilience.call(url, fetch) == "ok"
+    assert resilience.stats() == {}
+
+
+def test_not_found_leaves_the_breaker_alone(site):
+    resilience = Resilience(retries=0, failure_threshold=2, reset_timeout=0.2)
+    url = f"{site.url}/missing.html"
+    host = url.split("/")[2]
+
+    def fetch():
+        requests.get(url, timeout=5).raise_for_status()
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        resilience.call(url, Flaky(http_error(503)))
+    with pytest.raises(requests.exceptions.HTTPError):
+        resilience.call(url, fetch)
+    assert resilience.stats()[host] == {'state': 'closed', 'failures': 1}
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        resilience.call(url, Flaky(http_error(503)))
+    time.sleep(0.25)
+    # A 404 from the half-open probe neither closes the breaker nor re-opens it.
+    with pytest.raises(requests.exceptions.HTTPError):
+        resilience.call(url, fetch)
+    assert resilience.stats()[host]['state'] == 'half_open'
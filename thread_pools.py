@@ -0,0 +1,30 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class GrowingThreadPool:
+    """A shared ThreadPoolExecutor that is swapped for a larger one when a caller needs more workers
+
+    Executors cannot be resized. The smaller pool is dropped rather than shut
+    down, since other callers may still be submitting to it; its idle threads
+    exit once it is garbage collected.
+    """
+
+    def __init__(self, thread_name_prefix=""):
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def get(self, workers):
+        with self._lock:
+            if self._executor is None or self._workers < workers:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.thread_name_prefix)
+                self._workers = workers
+            return self._executor
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            executor, self._executor, self._workers = self._executor, None, 0
+        if executor is not None:
+            executor.shutdown(wait=wait)